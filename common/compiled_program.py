@@ -0,0 +1,198 @@
+import copy
+from typing import Union
+
+from common.environment import Environment
+from common.prorgam import Program
+from common.tokens.abstract_tokens import InventedToken, Token
+from common.tokens.control_tokens import If, LoopWhile, LoopIterationLimitReached, StepLimitReached
+
+# Opcodes of the flat instruction array. Every instruction is a tuple (opcode, argument, target), where target is an
+# absolute index into the instruction array. Tokens are stored as their bound apply methods, such that no attribute
+# lookups are needed while running.
+APPLY = 0        # argument: tuple of apply methods, executed in order
+IF = 1           # argument: (cond, e1, e2), an If of which both branches only consist of plain tokens
+LOOP = 2         # argument: (cond, body), a LoopWhile of which the body only consists of plain tokens
+BRANCH = 3       # argument: cond. If cond does not hold, jump to target
+JUMP = 4         # jump to target
+LOOP_ENTER = 5   # argument: cond. Starts a loop if cond holds, otherwise jumps to target (the end of the loop)
+LOOP_NEXT = 6    # argument: cond. Jumps back to target (the start of the loop body) as long as cond holds
+
+
+class CompiledProgram:
+    """A Program compiled into a flat instruction array. Invented tokens are inlined, consecutive plain tokens are merged
+    into a single instruction and control tokens are replaced by (conditional) jumps, such that the program runs in a
+    single dispatch loop instead of through recursive apply calls. If and LoopWhile tokens whose bodies are straight
+    line code, which covers all tokens generated by invent2, are compiled into one instruction each.
+
+    Running a CompiledProgram yields exactly the same Environment as interpreting the original Program."""
+
+    def __init__(self, program: Program):
+        """Compiles the given Program."""
+        self.program = program
+        self.code: list[tuple] = []
+        self._pending: list = []
+
+        for token in program.sequence:
+            self._emit(token)
+        self._flush()
+
+    @staticmethod
+    def _straight_line(tokens: list[Token]) -> Union[tuple, None]:
+        """Returns the apply methods of the given tokens with invented tokens inlined, or None if a control token is
+        found."""
+        res = []
+
+        for token in tokens:
+            if isinstance(token, (If, LoopWhile)):
+                return None
+            if isinstance(token, InventedToken):
+                inner = CompiledProgram._straight_line(token.tokens)
+                if inner is None:
+                    return None
+                res.extend(inner)
+            else:
+                res.append(token.apply)
+
+        return tuple(res)
+
+    def _flush(self):
+        if self._pending:
+            self.code.append((APPLY, tuple(self._pending), 0))
+            self._pending = []
+
+    def _emit(self, token: Token):
+        code = self.code
+
+        if isinstance(token, If):
+            e1 = self._straight_line(token.e1)
+            e2 = self._straight_line(token.e2)
+            self._flush()
+
+            if e1 is not None and e2 is not None:
+                code.append((IF, (token.cond.apply, e1, e2), 0))
+                return
+
+            branch = len(code)
+            code.append(None)
+            for t in token.e1:
+                self._emit(t)
+            self._flush()
+
+            if token.e2:
+                jump = len(code)
+                code.append(None)
+                code[branch] = (BRANCH, token.cond.apply, len(code))
+                for t in token.e2:
+                    self._emit(t)
+                self._flush()
+                code[jump] = (JUMP, None, len(code))
+            else:
+                code[branch] = (BRANCH, token.cond.apply, len(code))
+
+        elif isinstance(token, LoopWhile):
+            body = self._straight_line(token.loop_body)
+            self._flush()
+
+            if body is not None:
+                code.append((LOOP, (token.cond.apply, body), 0))
+                return
+
+            enter = len(code)
+            code.append(None)
+            for t in token.loop_body:
+                self._emit(t)
+            self._flush()
+            code.append((LOOP_NEXT, token.cond.apply, enter + 1))
+            code[enter] = (LOOP_ENTER, token.cond.apply, len(code))
+
+        elif isinstance(token, InventedToken):
+            for t in token.tokens:
+                self._emit(t)
+
+        else:
+            # Any other token (including tokens defined outside of common.tokens) is executed as is.
+            self._pending.append(token.apply)
+
+    def interp(self, env: Environment) -> Environment:
+        """Interprets this program on a copy of the given Environment, returns the resulting Environment."""
+        nenv = copy.deepcopy(env)
+        nenv.program = self.program
+
+        return self.run(nenv)
+
+    def run(self, env: Environment) -> Environment:
+        """Executes the instruction array directly on the given Environment, which is altered in place."""
+        code = self.code
+        end = len(code)
+        pc = 0
+        env.steps = 0
+        env.max_steps = self.program.step_limit
+
+        # Iteration counters and limits of the non-fused loops that are currently running, innermost last.
+        calls = []
+        limits = []
+
+        while pc < end:
+            op, arg, target = code[pc]
+
+            if op == APPLY:
+                for f in arg:
+                    env = f(env)
+            elif op == IF:
+                cond, e1, e2 = arg
+                for f in (e1 if cond(env) else e2):
+                    env = f(env)
+            elif op == LOOP:
+                cond, body = arg
+                n = 0
+                limit = env.loop_limit()
+                while cond(env):
+                    if n > limit:
+                        raise LoopIterationLimitReached()
+                    n += 1
+                    env.steps += 1
+                    if env.steps > env.max_steps:
+                        raise StepLimitReached()
+                    for f in body:
+                        env = f(env)
+            elif op == LOOP_NEXT:
+                if arg(env):
+                    if calls[-1] > limits[-1]:
+                        raise LoopIterationLimitReached()
+                    calls[-1] += 1
+                    env.steps += 1
+                    if env.steps > env.max_steps:
+                        raise StepLimitReached()
+                    pc = target
+                    continue
+                calls.pop()
+                limits.pop()
+            elif op == BRANCH:
+                if not arg(env):
+                    pc = target
+                    continue
+            elif op == JUMP:
+                pc = target
+                continue
+            else:
+                limit = env.loop_limit()
+                if not arg(env):
+                    pc = target
+                    continue
+                if limit < 0:
+                    raise LoopIterationLimitReached()
+                env.steps += 1
+                if env.steps > env.max_steps:
+                    raise StepLimitReached()
+                calls.append(1)
+                limits.append(limit)
+
+            pc += 1
+
+        return env
+
+    def __len__(self):
+        return len(self.code)
+
+    def __str__(self):
+        return "CompiledProgram(%s)" % self.program
@@ -1,7 +1,20 @@
 from dataclasses import dataclass
+from operator import ne
 import copy
 import re
 
+from common.lru_cache import LRUCache
+
+# Number of set bits in an integer. int.bit_count is only available from Python 3.10 onwards.
+try:
+    popcount = int.bit_count
+except AttributeError:
+    def popcount(n: int) -> int:
+        return bin(n).count("1")
+
+# Default maximum number of loop iterations in a single execution of a program, counted over all of its loops together.
+STEP_LIMIT = 10000
+
 
 @dataclass(eq=True, unsafe_hash=True)
 class Environment:
@@ -9,22 +22,50 @@ class Environment:
 
     def __init__(self):
         self.program = None
+        # Loop iterations executed so far in the current execution of a program, and the maximum for that execution.
+        self.steps = 0
+        self.max_steps = STEP_LIMIT
 
     def distance(self, other: "Environment") -> float:
         """Returns the distance from this Environment to some other object."""
         raise NotImplementedError()
 
     def __deepcopy__(self, memdict={}):
+        """Returns a copy of this Environment, which keeps the loop iterations executed so far and their maximum, such
+        that a program continued on the copy is bounded by the same step budget."""
         raise NotImplementedError()
 
+    def _copy_steps(self, env: "Environment") -> "Environment":
+        """Gives 'env', a copy of this Environment, the steps executed so far and the maximum, and returns it."""
+        env.steps = self.steps
+        env.max_steps = self.max_steps
+        return env
+
+    def incremental_distance(self, other: "Environment", parent: "Environment", parent_distance: float) -> float:
+        """Returns the distance from this Environment to 'other', given that this Environment was obtained by applying
+        tokens on 'parent', which has (exact) distance 'parent_distance' to 'other'. Subclasses override this to derive
+        the distance from the parent's one when only a small change was made."""
+        return self.distance(other)
+
     def correct(self, other: "Environment") -> bool:
         """Returns whether this state is the desired one given a desired output Environment."""
         raise NotImplementedError()
 
     def loop_limit(self) -> int:
-        """Returns the max amount of loop iterations based on the environment."""
+        """Returns the max amount of iterations of a single loop based on the environment. The iterations of all loops
+        in an execution together are bounded by 'max_steps'."""
         return 100
 
+    def checkpoint(self):
+        """Returns a marker of the current state of this Environment. Tokens can then be applied on this Environment
+        directly, after which 'rollback' restores the state of the marker. This avoids copying the Environment every
+        time a program is evaluated. Checkpoints can be nested, but must be rolled back in reverse order."""
+        raise NotImplementedError()
+
+    def rollback(self, marker):
+        """Restores the state of this Environment to the one of the given marker, obtained through 'checkpoint'."""
+        raise NotImplementedError()
+
 
 @dataclass(eq=True)
 class RobotEnvironment(Environment):
@@ -52,7 +93,13 @@ class RobotEnvironment(Environment):
         assert (not holding or (rx == bx and ry == by))
         
     def __deepcopy__(self, memdict={}):
-        return RobotEnvironment(self.size, self.rx, self.ry, self.bx, self.by, self.holding)
+        return self._copy_steps(RobotEnvironment(self.size, self.rx, self.ry, self.bx, self.by, self.holding))
+
+    def checkpoint(self):
+        return self.rx, self.ry, self.bx, self.by, self.holding, self.program, self.steps
+
+    def rollback(self, marker):
+        self.rx, self.ry, self.bx, self.by, self.holding, self.program, self.steps = marker
 
     def __str__(self):
         return "RobotEnvironment(Robot: (%s, %s), Bal: (%s, %s), Holding: %s, Size: %s)" % \
@@ -87,23 +134,17 @@ class RobotEnvironment(Environment):
     def distance(self, other: "RobotEnvironment") -> int:
         assert self.size == other.size
 
-        def d(xy1: 'tuple[int, int]', xy2: 'tuple[int, int]'):
-            return abs(xy1[0] - xy2[0]) + abs(xy1[1] - xy2[1])
+        # The ball is not yet at its goal: the robot needs to walk to the ball (unless it is already there), grab it,
+        # carry it to its goal, drop it and walk to its own goal.
+        if self.bx != other.bx or self.by != other.by:
+            ball_to_goal = abs(self.bx - other.bx) + abs(self.by - other.by)
+            goal_to_robot_goal = abs(other.bx - other.rx) + abs(other.by - other.ry)
 
-        # position robot and position ball
-        pr = (self.rx, self.ry)
-        pb = (self.bx, self.by)
+            if self.rx != self.bx or self.ry != self.by:
+                return abs(self.rx - self.bx) + abs(self.ry - self.by) + ball_to_goal + goal_to_robot_goal + 2
+            return ball_to_goal + goal_to_robot_goal + 1
 
-        # position goal robot and position goal bal
-        pgr = (other.rx, other.ry)
-        pgb = (other.bx, other.by)
-
-        if pr != pb and pb != pgb:
-            return d(pr, pb) + d(pb, pgb) + d(pgb, pgr) + 2
-        elif pr == pb and pb != pgb:
-            return d(pr, pgb) + d(pgb, pgr) + 1
-        else:
-            return d(pr, pgr)
+        return abs(self.rx - other.rx) + abs(self.ry - other.ry)
 
     def correct(self, other: "RobotEnvironment") -> bool:
         return (self.rx, self.ry, self.bx, self.by, self.holding) \
@@ -144,6 +185,10 @@ class StringEnvironment(Environment):
         # Manipulating strings as a list of characters is more efficient.
         self.string_array = string_array
         self.pos = pos
+
+        # Changes to string_array since the first checkpoint, as (position, character, dropped), None if no checkpoint
+        # is active. See 'checkpoint'.
+        self.undo_log = None
         
         assert 0 <= pos < len(string_array) or len(string_array) == 0
 
@@ -153,7 +198,39 @@ class StringEnvironment(Environment):
         return "".join(self.string_array)
 
     def __deepcopy__(self, memdict={}):
-        return StringEnvironment(string_array=copy.copy(self.string_array), pos=self.pos)
+        return self._copy_steps(StringEnvironment(string_array=copy.copy(self.string_array), pos=self.pos))
+
+    def set_char(self, pos: int, char: str):
+        """Replaces the character at 'pos', recording the change if a checkpoint is active."""
+        if self.undo_log is not None:
+            self.undo_log.append((pos, self.string_array[pos], False))
+        self.string_array[pos] = char
+
+    def drop_char(self, pos: int):
+        """Removes the character at 'pos', recording the change if a checkpoint is active."""
+        if self.undo_log is not None:
+            self.undo_log.append((pos, self.string_array[pos], True))
+        del self.string_array[pos]
+
+    def checkpoint(self):
+        if self.undo_log is None:
+            self.undo_log = []
+        return self.pos, len(self.undo_log), self.program, self.steps
+
+    def rollback(self, marker):
+        self.pos, length, self.program, self.steps = marker
+        log = self.undo_log
+
+        while len(log) > length:
+            pos, char, dropped = log.pop()
+            if dropped:
+                self.string_array.insert(pos, char)
+            else:
+                self.string_array[pos] = char
+
+        # Stop recording changes once the outermost checkpoint is rolled back.
+        if length == 0:
+            self.undo_log = None
 
     def __hash__(self):
         return hash((self.to_string(), self.pos))
@@ -211,43 +288,98 @@ class StringEnvironment(Environment):
                 mem[i][j] = min(cases)
         return mem[m][n]
 
-    distance_map = {}
-
-    @staticmethod
-    def _levenshtein_eff(s1, s2):
-        if (s1, s2) not in StringEnvironment.distance_map:
-            StringEnvironment.distance_map[(s1, s2)] = StringEnvironment._levenshtein_rec(s1, s2)
-
-        return StringEnvironment.distance_map[(s1, s2)]
+    # Bounded cache of computed distances, keyed by pairs of strings. Replaced for every search by SearchAlgorithm.run.
+    distance_map = LRUCache(100000)
 
     @staticmethod
-    def _levenshtein_rec(s1, s2):
+    def edit_distance(s1: str, s2: str, upper_bound: float = float('inf')) -> int:
+        """Returns the Levenshtein distance between two strings, using the bit-parallel algorithm of Myers (as
+        formulated by Hyyrö). Every column of the dynamic programming matrix is computed in a constant number of integer
+        operations, without slicing the strings or allocating a matrix.
+
+        If an 'upper_bound' is given, the computation stops as soon as the distance is known to exceed it. In that case
+        a lower bound on the distance is returned, which is larger than 'upper_bound'."""
+        # The shorter string is encoded in the bit vectors.
+        if len(s1) > len(s2):
+            s1, s2 = s2, s1
         m = len(s1)
         n = len(s2)
 
-        if m == 0:
-            return n
+        if m == 0 or n - m > upper_bound:
+            return n - m
+
+        # Bit i of peq[c] is set if s1[i] == c.
+        peq = {}
+        for i, c in enumerate(s1):
+            peq[c] = peq.get(c, 0) | (1 << i)
+
+        mask = (1 << m) - 1
+        last = 1 << (m - 1)
+        pv = mask
+        mv = 0
+        score = m
+        remaining = n
+
+        for c in s2:
+            eq = peq.get(c, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | (~(xh | pv) & mask)
+            mh = pv & xh
+
+            if ph & last:
+                score += 1
+            elif mh & last:
+                score -= 1
+
+            ph = (ph << 1) | 1
+            mh = mh << 1
+            pv = (mh | ~(xv | ph)) & mask
+            mv = ph & xv
+
+            # Every remaining character of s2 lowers the distance by at most one.
+            remaining -= 1
+            if score - remaining > upper_bound:
+                return score - remaining
+
+        return score
+
+    def distance(self, other: "StringEnvironment", upper_bound: float = float('inf')) -> int:
+        """Returns the Levenshtein distance to another StringEnvironment. If the distance exceeds the optional
+        'upper_bound', some value larger than 'upper_bound' may be returned instead, see 'edit_distance'."""
+        s1 = "".join(self.string_array)
+        s2 = "".join(other.string_array)
+        key = (s1, s2)
 
-        if n == 0:
-            return m
+        d = self.distance_map.get(key)
+        if d is not None:
+            return d
 
-        if s1[0] == s2[0]:
-            return StringEnvironment._levenshtein_eff(s1[1:], s2[1:])
+        d = self.edit_distance(s1, s2, upper_bound)
 
-        return 1 + min(
-            StringEnvironment._levenshtein_eff(s1[1:], s2),
-            StringEnvironment._levenshtein_eff(s1, s2[1:]),
-            StringEnvironment._levenshtein_eff(s1[1:], s2[1:])
-        )
+        # Only exact distances are cached.
+        if d <= upper_bound:
+            self.distance_map.put(key, d)
 
-    def distance(self, other: "StringEnvironment") -> int:
-        s1 = "".join(self.string_array)
-        s2 = "".join(other.string_array)
+        return d
+
+    def incremental_distance(self, other: "StringEnvironment", parent: "StringEnvironment",
+                             parent_distance: float) -> int:
+        string_array, parent_array = self.string_array, parent.string_array
+        if len(string_array) != len(parent_array):
+            # Characters were inserted or removed, to which neither case below applies.
+            return self.distance(other)
 
-        if (s1, s2) not in self.distance_map:
-            self.distance_map[(s1,s2)] = self._levenshtein_eff(s1, s2)
+        # The comparison stops at the first changed character.
+        if string_array == parent_array:
+            # Only the pointer moved.
+            return parent_distance
 
-        return self.distance_map[(s1,s2)]
+        if parent_distance == 0 and sum(map(ne, string_array, parent_array)) == 1:
+            # A single character of the desired string was changed.
+            return 1
+
+        return self.distance(other)
 
     def correct(self, other: "StringEnvironment") -> bool:
         return self.to_string() == other.to_string()
@@ -276,23 +408,44 @@ class StringEnvironment(Environment):
 
 @dataclass(eq=True, unsafe_hash=True)
 class PixelEnvironment(Environment):
+    """Environment for drawing on a grid of pixels. For efficiency the pixels are stored as the bits of a single integer
+    'bitmap', in which bit (width * y + x) is set if pixel (x, y) is drawn."""
     width: int
     height: int
     x: int
     y: int
-    pixels: tuple[bool]
+    bitmap: int
 
-    def __init__(self, width, height, x, y, pixels=None):
+    def __init__(self, width, height, x, y, pixels=None, bitmap: int = 0):
+        """Creates a new PixelEnvironment given its size, the position of the pointer and either a sequence of booleans
+        'pixels' or an integer 'bitmap'. All pixels are empty by default."""
         super().__init__()
 
         self.width = width
         self.height = height
         self.x = x
         self.y = y
-        self.pixels = pixels or tuple(False for _ in range(width * height))
+        self.bitmap = bitmap if pixels is None else self._to_bitmap(pixels)
         assert 0 <= x < width
         assert 0 <= y < height
 
+    @staticmethod
+    def _to_bitmap(pixels) -> int:
+        bitmap = 0
+        for i, pixel in enumerate(pixels):
+            if pixel:
+                bitmap |= 1 << i
+        return bitmap
+
+    @property
+    def pixels(self) -> tuple[bool]:
+        """The pixels as a tuple of booleans, row by row."""
+        return tuple(bool(self.bitmap >> i & 1) for i in range(self.width * self.height))
+
+    @pixels.setter
+    def pixels(self, pixels):
+        self.bitmap = self._to_bitmap(pixels)
+
     def __str__(self):
         return "PixelEnvironment((%s, %s), %s)" % (self.x, self.y, self.pixels)
 
@@ -308,18 +461,50 @@ class PixelEnvironment(Environment):
         return PixelEnvironment(width, height, x, y, pixels)
 
     def __deepcopy__(self, memdict={}):
-        return PixelEnvironment(self.width, self.height, self.x, self.y, self.pixels)
+        return self._copy_steps(PixelEnvironment(self.width, self.height, self.x, self.y, bitmap=self.bitmap))
+
+    def checkpoint(self):
+        return self.x, self.y, self.bitmap, self.program, self.steps
+
+    def rollback(self, marker):
+        self.x, self.y, self.bitmap, self.program, self.steps = marker
+
+    def draw(self):
+        """Draws the pixel at the pointer."""
+        self.bitmap |= 1 << (self.width * self.y + self.x)
+
+    def erase(self):
+        """Erases the pixel at the pointer."""
+        self.bitmap &= ~(1 << (self.width * self.y + self.x))
+
+    def is_drawn(self, x: int, y: int) -> bool:
+        return bool(self.bitmap >> (self.width * y + x) & 1)
 
     @staticmethod
-    def _hamming_distance(tup1: tuple, tup2: tuple):
-        assert len(tup1) == len(tup2)
-        return sum([e1 != e2 for (e1, e2) in zip(tup1, tup2)])
+    def _hamming_distance(bitmap1: int, bitmap2: int):
+        return popcount(bitmap1 ^ bitmap2)
 
     def correct(self, other: "PixelEnvironment") -> bool:
-        return self.pixels == other.pixels
+        return self.bitmap == other.bitmap
 
     def distance(self, other: "PixelEnvironment") -> int:
-        return self._hamming_distance(self.pixels, other.pixels)
+        assert self.width * self.height == other.width * other.height
+        return self._hamming_distance(self.bitmap, other.bitmap)
+
+    def incremental_distance(self, other: "PixelEnvironment", parent: "PixelEnvironment",
+                             parent_distance: float) -> int:
+        changed = self.bitmap ^ parent.bitmap
+
+        if changed == 0:
+            return parent_distance
+
+        # Exactly one pixel was drawn or erased: it either became equal to or different from the desired pixel.
+        if changed & (changed - 1) == 0:
+            if (self.bitmap ^ other.bitmap) & changed:
+                return parent_distance + 1
+            return parent_distance - 1
+
+        return self.distance(other)
 
     def to_formatted_string(self):
         char_empty = chr(11034)  # ⬚
@@ -330,10 +515,10 @@ class PixelEnvironment(Environment):
         for y in range(self.height):
             row = []
             for x in range(self.width):
-                pos = self.width * y + x
-                char = char_filled if self.pixels[pos] else char_empty
+                drawn = self.is_drawn(x, y)
+                char = char_filled if drawn else char_empty
                 if (self.x, self.y) == (x, y):
-                    char = char_pointer_filled if self.pixels[pos] else char_pointer_empty
+                    char = char_pointer_filled if drawn else char_pointer_empty
                 row.append(char)
             rows.append(" ".join(row))
         result = "\n".join(rows)
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Key-value cache holding at most 'capacity' entries. When full, the least recently used entry is evicted. The
+    number of hits, misses and evictions is counted, such that the capacity can be tuned against the hit rate."""
+
+    def __init__(self, capacity: int):
+        assert capacity > 0
+        self.capacity = capacity
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Returns the value stored for 'key' and marks it as most recently used, or 'default' if it is not present."""
+        entries = self._entries
+
+        if key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        """Stores 'value' for 'key', evicting the least recently used entry if the cache is full."""
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the counters of this cache."""
+        return {
+            "capacity": self.capacity,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,3 +1,4 @@
+from common.environment import STEP_LIMIT
 from common.tokens.abstract_tokens import *
 import copy
 
@@ -5,11 +6,14 @@ import copy
 class Program:
     """Wrapper class for a list of Tokens, a program."""
 
-    def __init__(self, tokens: list[EnvToken], recurse_limit: int = 300, loop_limit: int = 100):
-        """Creates a new program given a sequence of Tokens."""
+    def __init__(self, tokens: list[EnvToken], recurse_limit: int = 300, loop_limit: int = 100,
+                 step_limit: int = STEP_LIMIT):
+        """Creates a new program given a sequence of Tokens. An execution of the program fails with StepLimitReached
+        once its loops have iterated more than 'step_limit' times in total."""
         self.sequence = tokens
         self.recursive_call_limit = recurse_limit
         self.loop_limit = loop_limit
+        self.step_limit = step_limit
     
     def __gt__(self, other):
         if self.number_of_tokens() > other.number_of_tokens():
@@ -24,6 +28,8 @@ class Program:
         # Setup for recursive calls
         if top_level_program:
             nenv.program = self
+            nenv.steps = 0
+            nenv.max_steps = self.step_limit
 
         for t in self.sequence:
             if(not isinstance(t, Token)):
@@ -32,9 +38,32 @@ class Program:
 
         return nenv
 
+    def interp_in_place(self, env: Environment) -> Environment:
+        """Interprets this program directly on the given Environment, which is altered. Together with
+        Environment.checkpoint and Environment.rollback this evaluates a program without copying the Environment."""
+        env.program = self
+        env.steps = 0
+        env.max_steps = self.step_limit
+
+        for t in self.sequence:
+            env = t.apply(env)
+
+        return env
+
     def number_of_tokens(self) -> int:
         return sum([t.number_of_tokens() for t in self.sequence])
 
+    def key(self) -> tuple:
+        """Returns the structural key of this program, the IDs of its tokens (see Token.token_id). Programs have equal
+        keys exactly when they consist of the same tokens, so the key can be used for caching instead of str."""
+        return tuple([t.token_id() for t in self.sequence])
+
+    def __eq__(self, other):
+        return isinstance(other, Program) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
     def __str__(self):
         return "Program([%s])" % ", ".join([str(t) for t in self.sequence])
 
@@ -0,0 +1,126 @@
+from common.prorgam import Program
+from common.tokens.abstract_tokens import InventedToken, Token
+from common.tokens.control_tokens import If, LoopWhile
+import common.tokens.pixel_tokens as pixel_tokens
+import common.tokens.robot_tokens as robot_tokens
+import common.tokens.string_tokens as string_tokens
+
+# The algebraic rules of all domains, keyed by token type. Token types are distinct across domains.
+_DOMAINS = [string_tokens, robot_tokens, pixel_tokens]
+INVERSES = set().union(*[d.Inverses for d in _DOMAINS])
+OVERRIDES = set().union(*[d.Overrides for d in _DOMAINS])
+NEGATIONS = {k: v for d in _DOMAINS for k, v in d.Negations.items()}
+SAFE_CONDITIONS = set(NEGATIONS).difference(*[d.FailingConditions for d in _DOMAINS])
+
+
+class Simplifier:
+    """Rewrites programs into shorter programs using the algebraic rules of the tokens, without running them.
+
+    The result is canonical in that invented tokens are inlined, so it consists of plain tokens, If and LoopWhile only.
+    Then, recursively in the bodies of control tokens as well:
+      - a token followed by one that overrides it is removed, e.g. MakeUppercase, MakeUppercase or Draw, Erase;
+      - a condition right after a LoopWhile on that condition (or its negation) is known, so an If there is replaced by
+        the branch that is taken and a LoopWhile that will not iterate is removed;
+      - an If with equal branches is replaced by that branch, or removed if both are empty, if its condition cannot
+        raise an exception.
+    These rewrites are exact: the simplified program yields the same result on every environment, including raising an
+    exception in the same cases.
+
+    If not 'exact', tokens followed by their inverse are removed as well, e.g. MoveRight, MoveLeft, and Ifs with equal
+    branches are also rewritten if their condition can raise. The simplified program then yields the same result on
+    every environment on which the original program does not raise, so the original program is redundant: it can never
+    be better than the simplified one.
+
+    'rewrites' counts the rules applied so far, inlining invented tokens not included."""
+
+    def __init__(self, exact: bool = True):
+        self.exact = exact
+        self.rewrites = 0
+
+    def simplify(self, program: Program) -> Program:
+        return Program(self.simplify_tokens(program.sequence))
+
+    def simplify_tokens(self, tokens: list[Token]) -> list[Token]:
+        res = []
+
+        # Tokens still to be processed, in reverse order, such that the tokens of replaced tokens can be pushed.
+        stack = list(reversed(tokens))
+
+        while stack:
+            token = stack.pop()
+
+            if isinstance(token, InventedToken):
+                stack.extend(reversed(token.tokens))
+                continue
+
+            # The value of the condition of a LoopWhile is known right after it terminated.
+            known = None
+            if res and isinstance(res[-1], LoopWhile) and isinstance(token, (If, LoopWhile)):
+                known = self._known_condition(res[-1].cond, token.cond)
+
+            if isinstance(token, If):
+                if known is not None:
+                    self.rewrites += 1
+                    stack.extend(reversed(token.e1 if known else token.e2))
+                    continue
+
+                e1 = self.simplify_tokens(token.e1)
+                e2 = self.simplify_tokens(token.e2)
+
+                if self._shape(e1) == self._shape(e2) and (not self.exact or type(token.cond) in SAFE_CONDITIONS):
+                    self.rewrites += 1
+                    stack.extend(reversed(e1))
+                    continue
+
+                token = If(token.cond, e1, e2)
+
+            elif isinstance(token, LoopWhile):
+                if known is False:
+                    self.rewrites += 1
+                    continue
+
+                token = LoopWhile(token.cond, self.simplify_tokens(token.loop_body))
+
+            elif res:
+                pair = (type(res[-1]), type(token))
+
+                if pair in OVERRIDES:
+                    # The token may combine with the one before the removed token as well.
+                    self.rewrites += 1
+                    res.pop()
+                    stack.append(token)
+                    continue
+                if not self.exact and pair in INVERSES:
+                    self.rewrites += 1
+                    res.pop()
+                    continue
+
+            res.append(token)
+
+        return res
+
+    @staticmethod
+    def _known_condition(loop_cond: Token, cond: Token):
+        """Returns the value of 'cond' right after a LoopWhile on 'loop_cond' terminated, or None if unknown."""
+        if type(cond) is type(loop_cond):
+            return False
+        if NEGATIONS.get(type(loop_cond)) is type(cond):
+            return True
+        return None
+
+    @staticmethod
+    def _shape(tokens: list[Token]) -> tuple:
+        return tuple([t.token_id() for t in tokens])
+
+
+def simplify(program: Program, exact: bool = True) -> Program:
+    """Returns the simplified version of the given program, see Simplifier."""
+    return Simplifier(exact).simplify(program)
+
+
+def is_redundant(program: Program) -> bool:
+    """Returns whether the given program can be simplified into a shorter program that is at least as good, in which
+    case it does not need to be evaluated when that shorter program is evaluated as well."""
+    simplifier = Simplifier(exact=False)
+    simplifier.simplify(program)
+    return simplifier.rewrites > 0
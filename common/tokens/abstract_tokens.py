@@ -1,5 +1,26 @@
 from common.environment import *
 
+# Small integer IDs of the distinct token shapes, in order of first use. See Token.token_id.
+_token_ids: dict = {}
+# Bumped whenever an attribute of a token is reassigned, which invalidates the IDs stored on all tokens.
+_generation = 0
+
+
+def intern_shape(shape) -> int:
+    """Returns the ID of the given token shape, assigning the next free ID if it is new."""
+    token_id = _token_ids.get(shape)
+    if token_id is None:
+        token_id = _token_ids[shape] = len(_token_ids)
+    return token_id
+
+
+def clear_token_ids():
+    """Forgets all token shapes and the IDs stored on tokens, such that the IDs do not grow without bound over many
+    searches. Keys built from earlier IDs must not be compared to keys built afterwards."""
+    global _generation
+    _token_ids.clear()
+    _generation += 1
+
 
 class Token:
     """Abstract Token. Enforces that all tokens have an apply method."""
@@ -8,6 +29,33 @@ class Token:
         """Applies this Token on a given Environment."""
         raise NotImplementedError()
 
+    def shape(self):
+        """Returns a hashable description of the structure of this token, such that tokens with equal shapes behave the
+        same. Tokens without parameters are described by their type, tokens with parameters override this method."""
+        return type(self)
+
+    def token_id(self) -> int:
+        """Returns a small integer identifying the shape of this token: tokens get the same ID exactly when their
+        shapes are equal. The ID is computed once and stored on the token. Reassigning an attribute of any token, such
+        as the body of a loop held by this one, invalidates the stored IDs; lists of tokens must therefore be replaced
+        instead of altered in place."""
+        stored = self.__dict__.get("_token_id")
+        if stored is not None and stored[0] == _generation:
+            return stored[1]
+
+        shape = self.shape()
+        token_id = _token_ids.get(shape)
+        if token_id is None:
+            token_id = intern_shape(shape)
+        self.__dict__["_token_id"] = (_generation, token_id)
+        return token_id
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            global _generation
+            _generation += 1
+        object.__setattr__(self, name, value)
+
     def number_of_tokens(self) -> int:
         return 1
 
@@ -68,6 +116,9 @@ class InventedToken(EnvToken):
     def number_of_tokens(self) -> int:
         return sum([t.number_of_tokens() for t in self.tokens])
 
+    def shape(self):
+        return InventedToken, tuple([t.token_id() for t in self.tokens])
+
     def __str__(self):
         return "[%s]" % ", ".join([str(t) for t in self.tokens])
 
@@ -29,6 +29,9 @@ class If(ControlToken):
                sum([t.number_of_tokens() for t in self.e1]) + \
                sum([t.number_of_tokens() for t in self.e2])
 
+    def shape(self):
+        return If, self.cond.token_id(), tuple([t.token_id() for t in self.e1]), tuple([t.token_id() for t in self.e2])
+
     def __str__(self):
         return "If(%s [%s] [%s])" % (self.cond, ", ".join(list(map(str, self.e1))), ", ".join(list(map(str, self.e2))))
 
@@ -67,6 +70,9 @@ class LoopWhile(ControlToken):
             if calls > limit:
                 raise LoopIterationLimitReached()
             calls += 1
+            env.steps += 1
+            if env.steps > env.max_steps:
+                raise StepLimitReached()
 
             for token in self.loop_body:
                 token.apply(env)
@@ -76,6 +82,9 @@ class LoopWhile(ControlToken):
     def number_of_tokens(self) -> int:
         return 1 + sum([t.number_of_tokens() for t in self.loop_body])
 
+    def shape(self):
+        return LoopWhile, self.cond.token_id(), tuple([t.token_id() for t in self.loop_body])
+
     def __str__(self):
         return "LoopWhile(%s [%s])" % \
                (self.cond, ", ".join(list(map(str, self.loop_body))))
@@ -95,3 +104,9 @@ class LoopWhile(ControlToken):
 class LoopIterationLimitReached(Exception):
     """"Exception raised when the recursive call limit, set in the Program constructor is reached."""
     pass
+
+
+class StepLimitReached(LoopIterationLimitReached):
+    """Exception raised when the loops of a program have iterated more often in total than the step limit of the
+    program. It is a LoopIterationLimitReached, such that code handling runaway loops handles it as well."""
+    pass
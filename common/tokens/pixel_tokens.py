@@ -44,17 +44,13 @@ class NotAtRight(BoolToken):
 
 class Draw(TransToken):
 	def apply(self, env: PixelEnvironment) -> PixelEnvironment:
-		temp = list(env.pixels)
-		temp[env.width * env.y + env.x] = True
-		env.pixels = tuple(temp)
+		env.draw()
 		return env
 
 
 class Erase(TransToken):
 	def apply(self, env: PixelEnvironment) -> PixelEnvironment:
-		temp = list(env.pixels)
-		temp[env.width * env.y + env.x] = False
-		env.pixels = tuple(temp)
+		env.erase()
 		return env
 
 
@@ -92,3 +88,14 @@ class MoveDown(TransToken):
 
 BoolTokens = {AtTop(), AtBottom(), AtLeft(), AtRight(), NotAtTop(), NotAtBottom(), NotAtLeft(), NotAtRight()}
 TransTokens = {MoveRight(), MoveDown(), MoveLeft(), MoveUp(), Draw()}
+
+# Algebraic rules of the tokens, used by common.simplifier.
+# Pairs of tokens of which the second undoes the first whenever both can be applied.
+Inverses = {(MoveRight, MoveLeft), (MoveLeft, MoveRight), (MoveUp, MoveDown), (MoveDown, MoveUp)}
+# Pairs of tokens that together have the same effect as the second one alone, raising in the same cases.
+Overrides = {(Draw, Draw), (Erase, Erase), (Draw, Erase), (Erase, Draw)}
+# Every condition mapped to its negation.
+Negations = {AtTop: NotAtTop, AtBottom: NotAtBottom, AtLeft: NotAtLeft, AtRight: NotAtRight}
+Negations.update({v: k for k, v in Negations.items()})
+# Conditions that can raise InvalidTransition.
+FailingConditions = set()
@@ -125,3 +125,14 @@ class Grab(TransToken):
 
 BoolTokens = {AtTop(), AtBottom(), AtLeft(), AtRight(), NotAtTop(), NotAtBottom(), NotAtLeft(), NotAtRight()}
 TransTokens = {MoveRight(), MoveDown(), MoveLeft(), MoveUp(), Drop(), Grab()}
+
+# Algebraic rules of the tokens, used by common.simplifier.
+# Pairs of tokens of which the second undoes the first whenever both can be applied.
+Inverses = {(MoveRight, MoveLeft), (MoveLeft, MoveRight), (MoveUp, MoveDown), (MoveDown, MoveUp), (Grab, Drop)}
+# Pairs of tokens that together have the same effect as the second one alone, raising in the same cases.
+Overrides = set()
+# Every condition mapped to its negation.
+Negations = {AtTop: NotAtTop, AtBottom: NotAtBottom, AtLeft: NotAtLeft, AtRight: NotAtRight}
+Negations.update({v: k for k, v in Negations.items()})
+# Conditions that can raise InvalidTransition.
+FailingConditions = set()
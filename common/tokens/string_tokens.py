@@ -167,7 +167,7 @@ class MakeUppercase(TransToken):
         if len(env.string_array) == 0:
             raise InvalidTransition
 
-        env.string_array[env.pos] = env.string_array[env.pos].upper()
+        env.set_char(env.pos, env.string_array[env.pos].upper())
 
         return env
 
@@ -179,7 +179,7 @@ class MakeLowercase(TransToken):
         if len(env.string_array) == 0:
             raise InvalidTransition
 
-        env.string_array[env.pos] = env.string_array[env.pos].lower()
+        env.set_char(env.pos, env.string_array[env.pos].lower())
 
         return env
 
@@ -193,7 +193,7 @@ class Drop(TransToken):
             raise InvalidTransition
 
         #env.string_array = nstr[0:i] + nstr[i + 1:]
-        del env.string_array[env.pos]
+        env.drop_char(env.pos)
 
         env.pos = max(min(len(env.string_array) - 1, env.pos), 0)
 
@@ -203,3 +203,15 @@ class Drop(TransToken):
 BoolTokens = {AtEnd(), NotAtEnd(), AtStart(), NotAtStart(), IsLetter(), IsNotLetter(), IsUppercase(), IsNotUppercase(), IsLowercase(),
               IsNotLowercase(), IsNumber(), IsNotNumber(), IsSpace(), IsNotSpace()}
 TransTokens = {MoveRight(), MoveLeft(), MakeUppercase(), MakeLowercase(), Drop()}
+
+# Algebraic rules of the tokens, used by common.simplifier.
+# Pairs of tokens of which the second undoes the first whenever both can be applied.
+Inverses = {(MoveRight, MoveLeft), (MoveLeft, MoveRight)}
+# Pairs of tokens that together have the same effect as the second one alone, raising in the same cases.
+Overrides = {(MakeUppercase, MakeUppercase), (MakeLowercase, MakeLowercase)}
+# Every condition mapped to its negation.
+Negations = {AtEnd: NotAtEnd, AtStart: NotAtStart, IsLetter: IsNotLetter, IsUppercase: IsNotUppercase,
+             IsLowercase: IsNotLowercase, IsNumber: IsNotNumber, IsSpace: IsNotSpace}
+Negations.update({v: k for k, v in Negations.items()})
+# Conditions that can raise InvalidTransition, all of them on an empty string.
+FailingConditions = set(Negations)
@@ -14,7 +14,9 @@ from search.MCTS.datastructures import SearchTreeNode, TokenScore
 from search.MCTS.exceptions import MaxNumberOfIterationsExceededException, InvalidProgramException, \
     SimilarProgramAlreadyFoundException, SelectedTokenHasIntiniteTokenScoreException, RootHasNoOptionsException
 from search.abstract_search import SearchAlgorithm
+from search.evaluator import Evaluator, distance_with_penalty
 from search.search_result import SearchResult
+from search.token_library import token_libraries
 
 
 
@@ -24,10 +26,12 @@ def deepcopy_program(program: Program) -> Program:
         tokens=[token for token in program.sequence],
         recurse_limit=program.recursive_call_limit,
         loop_limit=program.loop_limit,
+        step_limit=program.step_limit,
     )
 
 
 class MCTS(SearchAlgorithm):
+    supports_transposition_table = True
 
     def __init__(self, time_limit_sec: float):
         super().__init__(time_limit_sec)
@@ -75,8 +79,9 @@ class MCTS(SearchAlgorithm):
 
         # set the best program to be an empty token list and calculate the associated loss
         self._best_program = Program([])
-        resulting_envs = MCTS.get_resulting_envs(program=self._best_program, input_envs=self.input_envs)
-        self.smallest_loss = MCTS.compute_loss(resulting_envs, self.output_envs)
+        self.evaluator = Evaluator(training_examples, loss=distance_with_penalty, mean=True)
+        resulting_envs = self.evaluator.outputs(self._best_program)
+        self.smallest_loss, _ = self.evaluator.cost_of(resulting_envs)
         self.number_of_explored_programs += 1
         self.number_of_iterations = 1
         self.cost_per_iteration = [(self.number_of_iterations, self.smallest_loss)]
@@ -86,7 +91,9 @@ class MCTS(SearchAlgorithm):
         self.max_expected_loss = self.smallest_loss
 
         # compute invented tokens that are composed of several other tokens
-        self.invented_tokens: List[InventedToken] = MCTS.MCTS_invent(trans_tokens=trans_tokens, bool_tokens=bool_tokens)
+        self.invented_tokens: List[InventedToken] = token_libraries.get(
+            "MCTS_invent", trans_tokens, bool_tokens, (),
+            lambda: MCTS.MCTS_invent(trans_tokens=trans_tokens, bool_tokens=bool_tokens))
         # add each token to the dictionary with score 0
         for token in self.invented_tokens:
             self.token_scores_dict[token] = TokenScore(score=0, visits=0, max_token_try=self.MAX_TOKEN_TRY)
@@ -95,8 +102,8 @@ class MCTS(SearchAlgorithm):
         self.search_tree: SearchTreeNode = \
             SearchTreeNode.initialize_search_tree(env_tokens=deque(self.invented_tokens), loss=self.smallest_loss)
 
-        # initialize a dictionary that keeps track of outcomes of programs
-        self.dict_with_obtained_output_environments[resulting_envs] = self.search_tree
+        # keep track of outcomes of programs
+        self.obtained_before(resulting_envs, self.search_tree)
 
     # TODO make sure that the type of trans_ and bool_token is set[Type[Token]] and not set[Token]
     def iteration(self, training_example: List[Example], trans_tokens: set[Type[TransToken]],
@@ -194,31 +201,15 @@ class MCTS(SearchAlgorithm):
         """Gets the average loss function of applying the program to each example.
         Returns float number equal to infinity if one of the examples could not be interpreted with the program"""
 
-        total_loss = 0.0
-
-        try:
-            for example in examples:
-                program_output = program.interp(example.input_environment)
-                loss = example.output_environment.distance(program_output)
-                total_loss += loss
-        except (InvalidTransition, MaxNumberOfIterationsExceededException, LoopIterationLimitReached):
+        total_loss, _ = Evaluator(examples, mean=True).evaluate(program)
+        if total_loss == float("inf"):
             raise InvalidProgramException
 
-        return total_loss / len(examples)
+        return total_loss
 
     @staticmethod
     def compute_loss(resulting_envs: Tuple[Environment], wanted_envs: Tuple[Environment]):
-        total_loss = 0.0
-        try:
-            for result_env, wanted_env in zip(resulting_envs, wanted_envs):
-                if result_env.correct(wanted_env):
-                    not_correct_punishment = 0
-                else:
-                    not_correct_punishment = 1
-                loss = result_env.distance(wanted_env) + not_correct_punishment
-                total_loss += loss
-        except (InvalidTransition, MaxNumberOfIterationsExceededException, LoopIterationLimitReached):
-            raise InvalidProgramException
+        total_loss = sum(map(distance_with_penalty, resulting_envs, wanted_envs))
 
         return total_loss / len(resulting_envs)
 
@@ -376,6 +367,19 @@ class MCTS(SearchAlgorithm):
         )
         return new_node
 
+    def obtained_before(self, resulting_envs: Tuple[Environment], node: SearchTreeNode) -> bool:
+        """Records that the program of the given node results in 'resulting_envs'. Returns whether these environments
+        were obtained by another program before. If enabled, the shared transposition table is used, which bounds the
+        number of recorded outcomes."""
+        if self.transposition_table is not None:
+            return self.transposition_table.visit(resulting_envs)
+
+        if resulting_envs in self.dict_with_obtained_output_environments:
+            return True
+
+        self.dict_with_obtained_output_environments[resulting_envs] = node
+        return False
+
     def simulate_and_return_reward(
             self,
             node: SearchTreeNode,
@@ -387,14 +391,11 @@ class MCTS(SearchAlgorithm):
             self.number_of_explored_programs += 1
 
             # try interpreting the found program on the provided examples
-            resulting_envs = MCTS.get_resulting_envs(
-                program=program,
-                input_envs=self.input_envs,
-            )
+            resulting_envs = self.evaluator.outputs(program)
 
             # TODO somehow check which one is shorter and keep that one. E.g. save node AND program length
             # check that the resulting_envs have not been found before and then add them to the dictionary
-            if resulting_envs in self.dict_with_obtained_output_environments:
+            if self.obtained_before(resulting_envs, node):
 
                 # before raising exception, update token_score
                 token_score = self.token_scores_dict[node.chosen_token]
@@ -402,9 +403,8 @@ class MCTS(SearchAlgorithm):
 
                 raise SimilarProgramAlreadyFoundException("Another program resulting in the exact same output "
                                                           "environments was already found.")
-            self.dict_with_obtained_output_environments[resulting_envs] = node
 
-            loss = MCTS.compute_loss(resulting_envs, self.output_envs)
+            loss, _ = self.evaluator.cost_of(resulting_envs)
             node.loss = loss
 
             # update token_score
@@ -6,8 +6,10 @@ from common.tokens.control_tokens import LoopIterationLimitReached
 from common.tokens.pixel_tokens import *
 from search.a_star.unique_priority_queue import UniquePriorityQueue
 from search.abstract_search import SearchAlgorithm
-from search.invent import invent2
+from search.convergence_trace import ConvergenceTrace
+from search.invent import iterInvent2, prune_equivalent
 from search.search_result import SearchResult
+from search.token_library import invent2_library
 
 MAX_TOKEN_FUNCTION_DEPTH = 3
 
@@ -33,16 +35,21 @@ class AStar(SearchAlgorithm):
         self.heuristic = self._heuristic_mean
         self.input_envs: tuple[Environment] = tuple(e.input_environment for e in training_examples)
         self.output_envs: tuple[Environment] = tuple(e.output_environment for e in training_examples)
-        self.tokens: list[Token] = invent2(trans_tokens, bool_tokens, MAX_TOKEN_FUNCTION_DEPTH)
+        if self.prune_equivalent_tokens:
+            self.tokens: list[Token] = prune_equivalent(iterInvent2(trans_tokens, bool_tokens, MAX_TOKEN_FUNCTION_DEPTH),
+                                                        list(self.input_envs), trans_tokens)
+        else:
+            self.tokens: list[Token] = invent2_library(trans_tokens, bool_tokens, MAX_TOKEN_FUNCTION_DEPTH)
         self.number_of_iterations: int = 0
         self._best_cost = float('inf')
         self._best_f_cost = float('inf')
         self.reached = {}
+        self.number_of_priority_updates = 0
         self._solution_found = False
         self._best_program_node = None
         self._best_f_program_node = None
-        self.g_cost_per_iteration = []   # (iteration_number, g_cost)
-        self.cost_per_iteration = []  # (iteration_number, h_cost)
+        self.g_cost_trace = ConvergenceTrace()   # (iteration_number, g_cost)
+        self.cost_per_iteration = ConvergenceTrace(improvements_only=True)  # (iteration_number, h_cost) of best nodes
         self.program_generator: Iterator[Union[Program, None]] = self.best_first_search_upq(
             self.input_envs, self.output_envs, self.tokens, self.loss_function, self.heuristic)
 
@@ -61,26 +68,39 @@ class AStar(SearchAlgorithm):
     def extend_result(self, search_result: SearchResult):
         search_result.dictionary['solution_found'] = self._solution_found
         search_result.dictionary['best_f_program'] = str(self.best_f_program)
-        search_result.dictionary['g_cost_per_iteration'] = self.g_cost_per_iteration
+        search_result.dictionary['g_cost_trace'] = list(self.g_cost_trace)
         search_result.dictionary['heuristic'] = self.heuristic.__name__
         search_result.dictionary['weight'] = self.weight
+        search_result.dictionary['number_of_priority_updates'] = self.number_of_priority_updates
         return search_result
 
     @staticmethod
     def _correct(from_states: tuple[Environment], to_states: tuple[Environment]) -> bool:
         return all(map(lambda tup: tup[0].correct(tup[1]), zip(from_states, to_states)))
 
+    # The heuristics combine the distances of the states of a node to the desired output states.
     @staticmethod
-    def _heuristic_mean(from_states: tuple[Environment], to_states: tuple[Environment]) -> float:
-        return sum(map(lambda tup: tup[0].distance(tup[1]), zip(from_states, to_states))) / len(from_states)
+    def _heuristic_mean(distances: tuple[float]) -> float:
+        return sum(distances) / len(distances)
 
     @staticmethod
-    def _heuristic_min(from_states: tuple[Environment], to_states: tuple[Environment]) -> float:
-        return min(map(lambda tup: tup[0].distance(tup[1]), zip(from_states, to_states)))
+    def _heuristic_min(distances: tuple[float]) -> float:
+        return min(distances)
 
     @staticmethod
-    def _heuristic_sum(from_states: tuple[Environment], to_states: tuple[Environment]) -> float:
-        return sum(map(lambda tup: tup[0].distance(tup[1]), zip(from_states, to_states)))
+    def _heuristic_sum(distances: tuple[float]) -> float:
+        return sum(distances)
+
+    @staticmethod
+    def _distances(from_states: tuple[Environment], to_states: tuple[Environment]) -> tuple[float]:
+        return tuple(map(lambda tup: tup[0].distance(tup[1]), zip(from_states, to_states)))
+
+    @staticmethod
+    def _child_distances(child: tuple[Environment], to_states: tuple[Environment], parent: tuple[Environment],
+                         parent_distances: tuple[float]) -> tuple[float]:
+        """Returns the distances of the states of a child node, derived from the distances of its parent node."""
+        return tuple(map(lambda tup: tup[0].incremental_distance(tup[1], tup[2], tup[3]),
+                         zip(child, to_states, parent, parent_distances)))
 
     @staticmethod
     def _find_program(node, reached):
@@ -92,8 +112,8 @@ class AStar(SearchAlgorithm):
         return Program(sequence)
 
     def save_node_stats(self, node, fcost, gcost, hcost):
-        self.cost_per_iteration.append((self.number_of_iterations, hcost))
-        self.g_cost_per_iteration.append((self.number_of_iterations, gcost))
+        self.cost_per_iteration.record(self.number_of_iterations, hcost)
+        self.g_cost_trace.record(self.number_of_iterations, gcost)
         if hcost < self._best_cost:
             self._best_cost = hcost
             self._best_program_node = node
@@ -106,15 +126,17 @@ class AStar(SearchAlgorithm):
     def best_first_search_upq(self, start_node: tuple[Environment], end_node: tuple[Environment],
                               tokens: list[Token], f, h) -> Iterator[Program]:
         self.reached = {start_node: (0, False, False)}  # for each reached node: (path_cost, previous_node, token_used)
+        distances = {start_node: self._distances(start_node, end_node)}  # for each reached node: distance per state
         queue = UniquePriorityQueue()
         gcost = 0
-        hcost = h(start_node, end_node)
+        hcost = h(distances[start_node])
         fcost = f(gcost, hcost)
         queue.insert(start_node, fcost)
         while queue:
             node, fcost = queue.pop()
             gcost, _, _ = self.reached[node]
-            hcost = h(node, end_node)
+            node_distances = distances[node]
+            hcost = h(node_distances)
             self.save_node_stats(node, fcost, gcost, hcost)
             if self._correct(node, end_node):
                 self.best_program_node = node
@@ -122,16 +144,21 @@ class AStar(SearchAlgorithm):
             else:
                 yield None
             node_copies = [copy.deepcopy(node) for _ in tokens]
+            children = []  # (child, fcost) pairs, inserted in the queue at once
             for token, node_copy in zip(tokens, node_copies):
+                self.deadline.check()
                 try:
                     child = tuple(map(token.apply, node_copy))
                     gcost_child = gcost + token.number_of_tokens()
                     # if child was not yet expanded or our new gcost is the smallest up until now
                     if child not in self.reached or gcost_child < self.reached[child][0]:
                         self.reached[child] = gcost_child, node, token
-                        hcost_child = h(child, end_node)
+                        if child not in distances:
+                            distances[child] = self._child_distances(child, end_node, node, node_distances)
+                        hcost_child = h(distances[child])
                         fcost_child = f(gcost_child, hcost_child)
-                        queue.insert(child, fcost_child)
+                        children.append((child, fcost_child))
                 except(InvalidTransition, LoopIterationLimitReached):
                     pass
+            self.number_of_priority_updates += queue.insert_all(children)
         return
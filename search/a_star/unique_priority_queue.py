@@ -1,21 +1,25 @@
 import itertools
-from dataclasses import dataclass, field
-from heapq import heappush, heappop
-from typing import Union
+import math
+from typing import Iterable, Union
 
-
-@dataclass(init=True, order=True)
-class Node:
-    priority: float
-    count: int
-    item: any = field(compare=False)
+# Number of children of every node of the heap. A wider heap is shallower, so inserting and decreasing a priority take
+# fewer steps, while popping compares more children per step.
+ARITY = 4
 
 
 class UniquePriorityQueue:
+    """Priority queue of unique items, of which the priority can be updated. Items with a lower priority are popped
+    first, and items with the same priority in the order in which they were inserted or last updated.
+
+    The queue is an indexed d-ary heap: the position of every item in the heap is kept, such that updating the priority
+    of an item moves its entry within the heap in O(log n) time, instead of leaving a stale entry behind. The heap thus
+    never holds more entries than there are items in the queue."""
 
-    def __init__(self):
-        self.heap: list[Node] = list()
-        self.item_set: dict[any, Union[Node, None]] = dict()
+    def __init__(self, arity: int = ARITY):
+        assert arity >= 2
+        self.arity = arity
+        self.heap: list[tuple[float, int, any]] = list()  # (priority, insertion number, item)
+        self.positions: dict[any, int] = dict()  # for each item: the index of its entry in heap
         self.count = itertools.count()
 
     def insert(self, item: any, priority: float) -> bool:
@@ -25,33 +29,105 @@ class UniquePriorityQueue:
         @param priority: Items with a lower priority will be popped first
         @return: True if item was already present and updated, False otherwise
         """
-        updated = False
-        if item in self.item_set:
-            self.item_set[item].item = None
-            updated = True
-        new_node = Node(priority, next(self.count), item)
-        heappush(self.heap, new_node)
-        self.item_set[item] = new_node
+        entry = (priority, next(self.count), item)
+        index = self.positions.get(item)
+        if index is None:
+            self.heap.append(entry)
+            self._sift_up(len(self.heap) - 1, entry)
+            return False
+
+        old = self.heap[index]
+        if entry < old:
+            self._sift_up(index, entry)
+        else:
+            self._sift_down(index, entry)
+        return True
+
+    def insert_all(self, items: Iterable[tuple[any, float]]) -> int:
+        """
+        Inserts or updates every (item, priority) pair in order, as insert does. If the batch is large compared to the
+        queue, the entries are placed first and the heap is rebuilt at once, in linear time.
+        @param items: Pairs of an object to insert in the queue and its priority
+        @return: The number of distinct items that were present before the batch and updated. An item inserted by the
+        batch and then updated again by it is not counted
+        """
+        items = list(items)
+        updated = len({item for item, _ in items if item in self.positions})
+        size = len(self.heap) + len(items)
+        if len(items) * math.log(max(size, 2), self.arity) <= size:
+            for item, priority in items:
+                self.insert(item, priority)
+            return updated
+
+        heap, positions = self.heap, self.positions
+        for item, priority in items:
+            entry = (priority, next(self.count), item)
+            index = positions.get(item)
+            if index is None:
+                positions[item] = len(heap)
+                heap.append(entry)
+            else:
+                heap[index] = entry
+
+        for index in reversed(range((len(heap) - 2) // self.arity + 1)):
+            self._sift_down(index, heap[index])
         return updated
 
     def pop(self) -> Union[tuple[any, float], None]:
         """
         Removes and returns item with lowest priority.
-        If the lowest priority is shared by two items, returns last added item
+        If the lowest priority is shared by two items, returns the item inserted or updated first
         @return: Tuple consisting of item with lowest priority and the value of priority
         """
-        while self.heap:
-            node = heappop(self.heap)
-            if node.item is not None:
-                self.item_set.pop(node.item)
-                return node.item, node.priority
-        raise IndexError("Queue is empty.")
+        if not self.heap:
+            raise IndexError("Queue is empty.")
+
+        priority, _, item = self.heap[0]
+        last = self.heap.pop()
+        del self.positions[item]
+        if self.heap:
+            self._sift_down(0, last)
+        return item, priority
+
+    def __contains__(self, item: any) -> bool:
+        return item in self.positions
+
+    def __len__(self) -> int:
+        return len(self.heap)
 
     def __bool__(self):
         """
         Returns whether the queue has items
         @return: True if queue contains one or more items, False otherwise.
         """
-        while self.heap and self.heap[0].item is None:
-            heappop(self.heap)
         return bool(self.heap)
+
+    def _sift_up(self, index: int, entry: tuple):
+        """Places 'entry' at 'index', moving it up past every ancestor with a higher priority."""
+        heap, positions, arity = self.heap, self.positions, self.arity
+        while index > 0:
+            parent = (index - 1) // arity
+            if not entry < heap[parent]:
+                break
+            heap[index] = heap[parent]
+            positions[heap[index][2]] = index
+            index = parent
+        heap[index] = entry
+        positions[entry[2]] = index
+
+    def _sift_down(self, index: int, entry: tuple):
+        """Places 'entry' at 'index', moving it down past every descendant with a lower priority."""
+        heap, positions, arity = self.heap, self.positions, self.arity
+        size = len(heap)
+        while True:
+            first = index * arity + 1
+            if first >= size:
+                break
+            child = min(range(first, min(first + arity, size)), key=heap.__getitem__)
+            if not heap[child] < entry:
+                break
+            heap[index] = heap[child]
+            positions[heap[index][2]] = index
+            index = child
+        heap[index] = entry
+        positions[entry[2]] = index
@@ -1,19 +1,27 @@
 import math
-import time
-from statistics import mean
-from typing import List
+from typing import List, Union
 
 from common.environment import StringEnvironment
 from common.prorgam import Program
-from common.tokens.abstract_tokens import Token, InvalidTransition, EnvToken
+from common.tokens.abstract_tokens import Token, InvalidTransition, EnvToken, clear_token_ids
 from common.experiment import Example
+from common.lru_cache import LRUCache
 from common.tokens.control_tokens import LoopIterationLimitReached
+from search.deadline import Deadline, DeadlineReached
+from search.evaluator import Evaluator
 from search.search_result import SearchResult
+from search.transposition_table import TranspositionTable, TRANSPOSITION_TABLE_SIZE
+
+# Default maximum number of string distances cached during a search.
+DISTANCE_CACHE_SIZE = 100000
 
 
 class SearchAlgorithm:
     """Abstract interface for a program synthesis search algorithm."""
 
+    # Whether the algorithm uses the transposition table if 'use_transposition_table' is set.
+    supports_transposition_table = False
+
     def __init__(self, time_limit_sec: float, params: dict = {}):
         self.time_limit_sec = time_limit_sec
         self.params = params
@@ -21,6 +29,24 @@ class SearchAlgorithm:
         self.number_of_explored_programs = 0
         self.cost_per_iteration = [(0, float("inf"))]   # save (iteration_number, cost) when new best_program is found
         self.number_of_iterations = 0
+        self.distance_cache_size = DISTANCE_CACHE_SIZE  # capacity of StringEnvironment.distance_map during a search
+
+        # Algorithms that support it skip programs that are observationally equivalent to an earlier one if enabled, see
+        # 'supports_transposition_table'. Enabling it for other algorithms raises a ValueError in run.
+        self.use_transposition_table = False
+        self.transposition_table_size = TRANSPOSITION_TABLE_SIZE
+        self.transposition_table: Union[TranspositionTable, None] = None
+
+        # Algorithms that support it keep one token of every group of observationally equivalent invented tokens.
+        self.prune_equivalent_tokens = False
+
+        # Evaluates programs on the training examples with early exits, for algorithms that create one in setup.
+        self.evaluator: Union[Evaluator, None] = None
+
+        # The time limit is measured in CPU time of this process, or in wall-clock time if enabled. The deadline is
+        # created by run, and can be checked by iteration implementations that do a lot of work per iteration.
+        self.wall_time = False
+        self.deadline: Union[Deadline, None] = None
 
     @property
     def best_program(self) -> Program:
@@ -51,37 +77,57 @@ class SearchAlgorithm:
     def run(self, training_examples: List[Example], trans_tokens: list[EnvToken], bool_tokens: list[EnvToken]) -> SearchResult:
         """"Runs the search method until a program is returned or the time limit is reached. First the setup method is
         called, followed by a repetition of the iteration method until either a result is obtained, or the time limit is
-        reached"""
-        start_time = time.process_time()
+        reached. An iteration is interrupted if it checks the deadline after the time limit has passed, see Deadline."""
+        self.deadline = Deadline(self.time_limit_sec, self.wall_time)
 
-        # Reset String distance dictionary
-        StringEnvironment.distance_map = {}
+        # Reset String distance cache
+        StringEnvironment.distance_map = LRUCache(self.distance_cache_size)
+        # Forget the token shapes of earlier searches
+        clear_token_ids()
+
+        if self.use_transposition_table and not self.supports_transposition_table:
+            raise ValueError("%s does not support a transposition table" % self.__class__.__name__)
+        self.transposition_table = TranspositionTable(self.transposition_table_size) \
+            if self.use_transposition_table else None
+
+        self.evaluator = None
 
         # Call setup.
         self.setup(training_examples, trans_tokens, bool_tokens)
 
-        # self.iteration returns whether a new iteration should be performed. Break the loop if time limit reached.
-        while self.iteration(training_examples, trans_tokens, bool_tokens):
-            if time.process_time() >= start_time + self.time_limit_sec:
-                break
+        # Programs evaluated during the search are only evaluated before the time limit.
+        if self.evaluator is not None:
+            self.evaluator.deadline = self.deadline
 
-        run_time = time.process_time() - start_time
+        # self.iteration returns whether a new iteration should be performed. Break the loop if time limit reached.
+        clock, end = self.deadline.clock, self.deadline.end
+        now = None  # the time at which the loop found the time limit passed
+        try:
+            while self.iteration(training_examples, trans_tokens, bool_tokens):
+                now = clock()
+                if now >= end:
+                    break
+            else:
+                now = None
+        except DeadlineReached:
+            now = None
+
+        run_time = (clock() if now is None else now) - self.deadline.start
+        deadline_stats = self.deadline.stats(run_time)
 
         # Extend results and return.
         return self.extend_result(SearchResult(
             program=self.best_program,
             process_time_sec=run_time,
             number_of_explored_programs=self.number_of_explored_programs,
-            cost_per_iteration=self.cost_per_iteration,
-            number_of_iterations=self.number_of_iterations
+            cost_per_iteration=list(self.cost_per_iteration),
+            number_of_iterations=self.number_of_iterations,
+            distance_cache_stats=StringEnvironment.distance_map.stats(),
+            transposition_table_stats=self.transposition_table.stats() if self.transposition_table is not None else None,
+            evaluator_stats=self.evaluator.stats() if self.evaluator is not None else None,
+            deadline_stats=deadline_stats
         ))
 
     @staticmethod
     def cost(exs: list[Example], p: Program):
-        def ex_cost(ex: Example):
-            try:
-                return p.interp(ex.input_environment).distance(ex.output_environment)
-            except (InvalidTransition, LoopIterationLimitReached):
-                return float('inf')
-
-        return mean([ex_cost(ex) for ex in exs])
+        return Evaluator(exs, mean=True).evaluate(p)[0]
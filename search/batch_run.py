@@ -21,9 +21,16 @@ from search.brute.brute import Brute
 from search.gen_prog.vanilla_GP import VanillaGP
 from search.gen_prog.vanilla_GP_alternatives.vanilla_GP_reworked import VanillaGPReworked
 from search.metropolis_hastings.metropolis import MetropolisHasting
+from search.token_library import token_libraries
 from search.vlns.large_neighborhood_search.algorithms.remove_n_insert_n import RemoveNInsertN
 
 
+def _use_token_library_dir(directory: str):
+    # Worker processes of a multi-core run share the token libraries through the directory of the run, if given.
+    if directory is not None:
+        token_libraries.directory = directory
+
+
 class BatchRun:
 
     def __init__(self,
@@ -32,10 +39,14 @@ class BatchRun:
                  search_algorithm: SearchAlgorithm,
                  file_name: str = "",
                  multi_core: bool = True,
-                 print_results: bool = False):
+                 print_results: bool = False,
+                 token_library_dir: str = None,
+                 wall_time: bool = False):
 
         self.domain = domain
         self.search_algorithm = search_algorithm
+        # Measure the time limit of every search in wall-clock time instead of CPU time.
+        self.search_algorithm.wall_time = wall_time
         self.algorithm_name = self._get_algorithm_name(search_algorithm)
         self.file_name = file_name
         self.files = self._complement_iters(domain, files)
@@ -47,6 +58,9 @@ class BatchRun:
         self.token_library = extract_trans_tokens_from_domain_name(domain)
         self.bools = extract_bool_tokens_from_domain_name(domain)
 
+        # Invented token libraries are built once per process, and shared through this directory during run if given.
+        self.token_library_dir = token_library_dir
+
         self.path = ""
         self.append_to_file = self.file_name != ""
         self._init_store_system()
@@ -59,21 +73,23 @@ class BatchRun:
         not_correct_results = []
         correct = 0
 
-        if self.multi_core:
-            with Pool(processes=os.cpu_count() - 1) as pool:
-                # collect results sorted and in chunks to minimize communication overhead on HPC
-                for i, d in enumerate(pool.imap(self._test_case, self.test_cases, chunksize=10)):
-                    case_data = f"{self.search_algorithm.__class__.__name__} {i}: {d['file']}, test_cost: {d['test_cost']}, train_cost: {d['train_cost']}, time: {d['execution_time']}, length: {d['program_length']}, iterations: {d['number_of_iterations']}"
-                    self.debug_print(case_data)
-                    self._store_result({"test_case": i, "data": case_data})
-                    results.append(d)
-        else:
-            for tc in self.test_cases:
-                res = self._test_case(tc)
-                results.append(res)
+        with token_libraries.using_directory(self.token_library_dir):
+            if self.multi_core:
+                with Pool(processes=os.cpu_count() - 1, initializer=_use_token_library_dir,
+                          initargs=(self.token_library_dir,)) as pool:
+                    # collect results sorted and in chunks to minimize communication overhead on HPC
+                    for i, d in enumerate(pool.imap(self._test_case, self.test_cases, chunksize=10)):
+                        case_data = f"{self.search_algorithm.__class__.__name__} {i}: {d['file']}, test_cost: {d['test_cost']}, train_cost: {d['train_cost']}, time: {d['execution_time']}, length: {d['program_length']}, iterations: {d['number_of_iterations']}"
+                        self.debug_print(case_data)
+                        self._store_result({"test_case": i, "data": case_data})
+                        results.append(d)
+            else:
+                for tc in self.test_cases:
+                    res = self._test_case(tc)
+                    results.append(res)
 
-                self.debug_print(
-                    f"{self.search_algorithm.__class__.__name__}: {res['file']}, test_cost: {res['test_cost']}, train_cost: {res['train_cost']}, time: {res['execution_time']}, length: {res['program_length']}, iterations: {res['number_of_iterations']}, initial error: {res['initial_error']}")
+                    self.debug_print(
+                        f"{self.search_algorithm.__class__.__name__}: {res['file']}, test_cost: {res['test_cost']}, train_cost: {res['train_cost']}, time: {res['execution_time']}, length: {res['program_length']}, iterations: {res['number_of_iterations']}, initial error: {res['initial_error']}")
 
         for res in results:
             if res['test_cost'] == 0 and res['train_cost'] == 0:
@@ -87,7 +103,7 @@ class BatchRun:
         self.debug_print("{} / {} ({}%) cases solved.".format(correct, s, p))
 
         keys = ["test_cost", "train_cost", "execution_time", "program_length", "number_of_explored_programs",
-                "number_of_iterations"]
+                "number_of_iterations", "deadline_overshoot"]
 
         # Store stats and the best program
         final = {
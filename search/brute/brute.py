@@ -1,18 +1,31 @@
 from common.tokens.control_tokens import LoopIterationLimitReached
 from common.prorgam import *
+from common.simplifier import is_redundant
 from common.tokens.pixel_tokens import *
 import copy
 import heapq
 
+from common.experiment import Example
 from search.abstract_search import SearchAlgorithm
-from search.invent import invent2
+from search.convergence_trace import ConvergenceTrace
+from search.evaluator import Evaluator, distance
+from search.invent import iterInvent2, prune_equivalent
+from search.prefix_cache import PrefixCache, PREFIX_CACHE_SIZE
 from search.search_result import SearchResult
+from search.token_library import invent2_library
 
 MAX_NUMBER_OF_ITERATIONS = 10
 MAX_TOKEN_FUNCTION_DEPTH = 3
+# Fraction by which a bounded frontier may exceed its maximum size before it is trimmed. Trimming takes O(n log n) time
+# for a frontier of n entries, so trimming only once every n * FRONTIER_SLACK pushes keeps the cost per push O(log n).
+FRONTIER_SLACK = 0.5
+# Frontiers more than this many times larger than the number of entries kept are trimmed with heapq.nsmallest instead
+# of sorting. Below it, sorting is faster: nsmallest took 1.5x longer at a ratio of 5 and 3.5x longer at a ratio of 1.5.
+SELECTION_RATIO = 10
 
 
 class Brute(SearchAlgorithm):
+    supports_transposition_table = True
 
     def __init__(self, time_limit_sec: float):
         super().__init__(time_limit_sec)
@@ -23,58 +36,235 @@ class Brute(SearchAlgorithm):
         self._best_program = Program([])
         self.best_cost = float("inf")
         self.current_program: Program = Program([])
+        self.prefix_cache_size = PREFIX_CACHE_SIZE
+        # whether to skip programs that the simplifier can rewrite into a shorter program that is at least as good
+        self.prune_redundant = False
+        # whether to search over the resulting environments instead of over programs, see _expand_states
+        self.state_based = False
+        # if set, the frontier is trimmed to this many best programs whenever it grows FRONTIER_SLACK larger
+        self.max_frontier_size = None
+        # if set, beam search is performed, keeping this many best programs of every length, see _beam_iteration
+        self.beam_width = None
 
 
     def setup(self, examples, trans_tokens, bool_tokens):
         self.programs = []
         self._best_program = Program([])
         # generate different token combinations
-        self.token_functions = invent2(trans_tokens, bool_tokens, MAX_TOKEN_FUNCTION_DEPTH)
+        if self.prune_equivalent_tokens:
+            self.token_functions = prune_equivalent(iterInvent2(trans_tokens, bool_tokens, MAX_TOKEN_FUNCTION_DEPTH),
+                                                    [e.input_environment for e in examples], trans_tokens)
+        else:
+            self.token_functions = invent2_library(trans_tokens, bool_tokens, MAX_TOKEN_FUNCTION_DEPTH)
+        self.number_of_pruned_programs = 0
+        # whether appending the token at the second index to a program ending with the first one is redundant
+        self._redundant_pairs = {}
+        if self.prune_redundant:
+            library_size = len(self.token_functions)
+            self.token_functions = [t for t in self.token_functions if not is_redundant(Program([t]))]
+            self.number_of_pruned_programs += library_size - len(self.token_functions)
 
         self.sample_inputs = [e.input_environment for e in examples]
         self.sample_outputs = [e.output_environment for e in examples]
-        self.programs = [(float('inf'), 1, self.current_program)]
+        # resulting environments of expanded programs, keyed by the indices of their tokens in token_functions
+        self.prefix_cache = PrefixCache(self.sample_inputs, self.sample_outputs, self.prefix_cache_size)
+        # (cost, 0 if solved else 1, number of tokens, indices of the tokens in token_functions, program); ties are broken
+        # by the smallest program first, and the unique indices keep the programs themselves from being compared
+        self.programs = [(float('inf'), 1, self.current_program.number_of_tokens(), (), self.current_program)]
+        if self.transposition_table is not None:
+            self.transposition_table.visit(copy.deepcopy(self.sample_inputs))
         heapq.heapify(self.programs)
 
         self.number_of_explored_programs = 0
-        self.cost_per_iteration = []   # save (iteration_number, cost) when new best_program is found
-        self.program_length_per_iteration = []  # (iteration_number, program_length)
+        self.cost_per_iteration = ConvergenceTrace(improvements_only=True)   # (iteration_number, cost) of best programs
+        self.program_length_trace = ConvergenceTrace()  # (iteration_number, program_length)
         self.number_of_iterations = 0
+        self.number_of_dropped_programs = 0
+
+        if self.state_based:
+            self._setup_states()
+
+    def _setup_states(self):
+        start = tuple(self.sample_inputs)
+        distances = tuple(s.distance(o) for s, o in zip(start, self.sample_outputs))
+        # for each reached tuple of environments: (parent tuple, index in token_functions of the token applied to it)
+        self.parents = {start: None}
+        # (cost, 0 if solved else 1, insertion number, environments, distances); the insertion number breaks ties
+        self.programs = [(float('inf'), 1, 0, start, distances)]
+        self.number_of_pushed_states = 1
+        self.number_of_duplicate_states = 0
 
     def iteration(self, examples, trans_tokens, bool_tokens) -> bool:
+        if self.beam_width is not None:
+            return self._beam_iteration()
 
-        (cost, solved, self.current_program) = heapq.heappop(self.programs)
+        if not self.programs:
+            # every reachable tuple of environments has been expanded (state based search only)
+            return False
 
-        self.cost_per_iteration.append((self.number_of_iterations, cost))
-        self.program_length_per_iteration.append((self.number_of_iterations, self.current_program.number_of_tokens()))
-        if cost < self.best_cost:
-            self._best_program = self.current_program
-            self.best_cost = cost
+        entry = heapq.heappop(self.programs)
 
-        if solved == 0:
+        if self._visit(entry):
             # return False to indicate no more iterations are necessary
             return False
 
         self.number_of_iterations += 1
 
-        self.programs = self.extend_program(
-            self.current_program, self.programs, self.token_functions, self.sample_inputs, self.sample_outputs)
+        self._expand(entry, self.programs)
+        if self.max_frontier_size is not None and \
+                len(self.programs) > self.max_frontier_size * (1 + FRONTIER_SLACK):
+            self.programs = self._best(self.programs, self.max_frontier_size)
 
         # return True to indicate that another iteration is required
         return True
 
-    def extend_program(self, best_program, programs, tokens: list[Token], sample_inputs, sample_outputs):
-        for token in tokens:
-            potentially_better_program = Program(best_program.sequence + [copy.copy(token)])
-            program_new = evaluate_program(potentially_better_program, sample_inputs, sample_outputs)
+    def _beam_iteration(self) -> bool:
+        """Iteration of beam search. The frontier is the beam: the 'beam_width' best programs of the current length.
+        All of them are expanded at once, and the best children form the next beam."""
+        beam = self.programs
+        if not beam:
+            return False
+
+        solved = [entry for entry in beam if entry[1] == 0]
+        if self._visit(solved[0] if solved else beam[0]):
+            return False
+
+        self.number_of_iterations += 1
+
+        children = []
+        for entry in beam:
+            self._expand(entry, children)
+        self.programs = self._best(children, self.beam_width)
+
+        return True
+
+    def _visit(self, entry: tuple) -> bool:
+        """Makes the program of the frontier entry the current program, and the best one if it has the lowest cost so
+        far. Returns whether it solves all examples."""
+        cost, solved = entry[0], entry[1]
+        self.current_program = self._program(entry[3]) if self.state_based else entry[4]
+
+        self.cost_per_iteration.record(self.number_of_iterations, cost)
+        self.program_length_trace.record(self.number_of_iterations, self.current_program.number_of_tokens())
+        if cost < self.best_cost:
+            self._best_program = self.current_program
+            self.best_cost = cost
+
+        return solved == 0
+
+    def _expand(self, entry: tuple, frontier: list[tuple]):
+        """Pushes the children of the frontier entry on 'frontier'."""
+        if self.state_based:
+            self._expand_states(entry[3], entry[4], frontier)
+        else:
+            self.extend_program(entry[4], entry[3], frontier, self.token_functions)
+
+    def _best(self, frontier: list[tuple], n: int) -> list[tuple]:
+        """Returns the 'n' best entries of 'frontier' as a sorted list, which is a heap, and counts the dropped ones.
+        The environments of dropped entries were never expanded, so in the state based search they are forgotten, such
+        that they can be reached again later and memory stays bounded."""
+        if len(frontier) <= n:
+            frontier.sort()
+            return frontier
+
+        self.number_of_dropped_programs += len(frontier) - n
+        if len(frontier) > n * SELECTION_RATIO:
+            # Few entries are kept from many, as in beam search: selecting them takes O(F log n) time for a frontier of
+            # F entries, instead of the O(F log F) of sorting it.
+            best = heapq.nsmallest(n, frontier)
+            if self.state_based:
+                # the insertion numbers are unique, so they tell which entries were kept
+                kept = {entry[2] for entry in best}
+                dropped = [entry for entry in frontier if entry[2] not in kept]
+        else:
+            frontier.sort()
+            best, dropped = frontier[:n], frontier[n:]
+
+        if self.state_based:
+            for entry in dropped:
+                del self.parents[entry[3]]
+        return best
+
+    def extend_program(self, best_program, key, programs, tokens: list[Token]):
+        # Only the new token is applied, on the cached resulting environments of best_program.
+        parent = self.prefix_cache.resolve(key, best_program.sequence)
+        if parent is None:
+            return programs
+        size = best_program.number_of_tokens()
+        for index, token in enumerate(tokens):
+            self.deadline.check()
+            if self.prune_redundant and key and self._redundant(key[-1], index, tokens):
+                self.number_of_pruned_programs += 1
+                continue
+            cost, solved = self.prefix_cache.evaluate(parent, token, self.transposition_table)
             self.number_of_explored_programs += 1
-            if program_new[0] != float('inf'):
-                heapq.heappush(programs, program_new)
+            if cost != float('inf'):
+                potentially_better_program = Program(best_program.sequence + [copy.copy(token)])
+                heapq.heappush(programs, (cost, 0 if solved else 1, size + token.number_of_tokens(), key + (index,),
+                                          potentially_better_program))
         # updated_programs = sorted(updated_programs, key=lambda x: (x[2], x[1]))
         return programs
 
+    def _expand_states(self, states: tuple[Environment], distances: tuple[float], frontier: list[tuple]):
+        """Expansion of the state based search. The frontier holds the tuples of environments resulting from programs
+        instead of the programs themselves, and every tuple is pushed only once: a program reaching the same
+        environments as an earlier one is skipped. A program is only stored as the parent of its environments and the
+        token applied to them, and rebuilt when needed. Memory is therefore bounded by the number of distinct tuples."""
+        tokens = self.token_functions
+        parent = self.parents[states]
+        last = None if parent is None else parent[1]
+
+        for index, token in enumerate(tokens):
+            self.deadline.check()
+            if self.prune_redundant and last is not None and self._redundant(last, index, tokens):
+                self.number_of_pruned_programs += 1
+                continue
+            self.number_of_explored_programs += 1
+            try:
+                children = tuple(token.apply(copy.deepcopy(s)) for s in states)
+            except (InvalidTransition, LoopIterationLimitReached):
+                continue
+
+            if children in self.parents:
+                self.number_of_duplicate_states += 1
+                continue
+            self.parents[children] = (states, index)
+
+            child_distances = tuple(c.incremental_distance(o, s, d) for c, o, s, d in
+                                    zip(children, self.sample_outputs, states, distances))
+            solved = all(c.correct(o) for c, o in zip(children, self.sample_outputs))
+            heapq.heappush(frontier, (sum(child_distances), 0 if solved else 1, self.number_of_pushed_states,
+                                           children, child_distances))
+            self.number_of_pushed_states += 1
+
+    def _program(self, states: tuple[Environment]) -> Program:
+        """Returns the program reaching 'states', following the parents back to the input environments."""
+        tokens = []
+        parent = self.parents[states]
+        while parent is not None:
+            states, index = parent
+            tokens.append(self.token_functions[index])
+            parent = self.parents[states]
+        return Program(tokens[::-1])
+
+    def _redundant(self, last: int, index: int, tokens: list[Token]) -> bool:
+        pair = (last, index)
+        if pair not in self._redundant_pairs:
+            self._redundant_pairs[pair] = is_redundant(Program([tokens[last], tokens[index]]))
+        return self._redundant_pairs[pair]
+
     def extend_result(self, search_result: SearchResult):
-        search_result.dictionary['program_length_per_iteration'] = self.program_length_per_iteration
+        search_result.dictionary['program_length_trace'] = list(self.program_length_trace)
+        if self.prune_redundant:
+            search_result.dictionary['number_of_pruned_programs'] = self.number_of_pruned_programs
+        if self.max_frontier_size is not None or self.beam_width is not None:
+            search_result.dictionary['number_of_dropped_programs'] = self.number_of_dropped_programs
+        if self.state_based:
+            search_result.dictionary['number_of_reached_states'] = len(self.parents)
+            search_result.dictionary['number_of_duplicate_states'] = self.number_of_duplicate_states
+        else:
+            for k, v in self.prefix_cache.stats().items():
+                search_result.dictionary['prefix_cache_' + k] = v
         return search_result
 
 
@@ -90,7 +280,7 @@ def print_ps(ps):
 
 
 def loss(output_pairs):
-    return sum([p[0].distance(p[1]) for p in output_pairs])
+    return sum([distance(p[0], p[1]) for p in output_pairs])
 
 
 def problem_solved(output_pairs):
@@ -98,20 +288,12 @@ def problem_solved(output_pairs):
 
 
 # takes 90 % of our time
-def evaluate_program(program, sample_inputs, sample_outputs):
-    program_outputs = []
-    try:
-        for input in sample_inputs:
-            program_output = program.interp(input)
-            program_outputs.append(program_output)
-        output_pairs = list(zip(program_outputs, sample_outputs))
-        cum_loss = loss(output_pairs)
-        solved = problem_solved(output_pairs)
-        if (solved):
-            return (cum_loss, 0, program)
-        return (cum_loss, 1, program)
-    except (InvalidTransition, LoopIterationLimitReached) as e:
-        return (float("inf"), 1, program)
+def evaluate_program(program, sample_inputs, sample_outputs, bound=float("inf")):
+    # Evaluation stops at the first sample on which the program fails, or once the loss exceeds 'bound'.
+    cum_loss, solved = Evaluator([Example(i, o) for i, o in zip(sample_inputs, sample_outputs)]).evaluate(program, bound)
+    if (solved):
+        return (cum_loss, 0, program)
+    return (cum_loss, 1, program)
 
 
 
@@ -0,0 +1,57 @@
+from array import array
+from typing import Iterator
+
+# Default maximum number of points stored by a ConvergenceTrace.
+MAX_TRACE_POINTS = 1000
+
+
+class ConvergenceTrace:
+    """Compact record of how a value, e.g. the cost of the current or best program, evolves over the iterations of a
+    search. Instead of a point per iteration only change points are stored: the iterations at which the value differs
+    from the previous one, or, if 'improvements_only' is set, at which it is lower than all previous ones.
+
+    At most 'max_points' points are stored, in preallocated arrays. Once there are more, every other point is dropped
+    and from then on only every 'stride'-th change point is stored, such that the points stay spread over the whole
+    search. The most recent change point is always reported.
+
+    Iterating over a trace yields (iteration, value) pairs. Search results report traces as lists of these pairs under
+    keys ending in '_trace', as they are not indexed by iteration like the lists under '_per_iteration' keys were. The
+    exception is 'cost_per_iteration', which already held the iterations at which a new best program was found."""
+
+    def __init__(self, improvements_only: bool = False, max_points: int = MAX_TRACE_POINTS):
+        assert max_points > 0
+        self.improvements_only = improvements_only
+        self.max_points = max_points
+        self.stride = 1
+
+        self._iterations = array("q")
+        self._values = array("d")
+        self._changes = 0  # number of change points seen
+        self._last = None  # the most recent change point
+
+    def record(self, iteration: int, value: float):
+        """Records the value at the given iteration. Nothing is stored if it is not a change point."""
+        last = self._last
+        if last is not None and (value >= last[1] if self.improvements_only else value == last[1]):
+            return
+
+        self._last = (iteration, value)
+        self._changes += 1
+        if (self._changes - 1) % self.stride:
+            return
+
+        self._iterations.append(iteration)
+        self._values.append(value)
+        if len(self._values) > self.max_points:
+            self._iterations = self._iterations[::2]
+            self._values = self._values[::2]
+            self.stride *= 2
+
+    def __iter__(self) -> Iterator[tuple[int, float]]:
+        yield from zip(self._iterations, self._values)
+        # the most recent change point is reported even if it was skipped
+        if self._last is not None and (self._changes - 1) % self.stride:
+            yield self._last
+
+    def __len__(self) -> int:
+        return len(self._values) + (1 if self._last is not None and (self._changes - 1) % self.stride else 0)
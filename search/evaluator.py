@@ -0,0 +1,198 @@
+import copy
+import math
+import time
+from typing import Callable, Hashable, Union
+
+from common.environment import Environment
+from common.experiment import Example
+from common.lru_cache import LRUCache
+from common.prorgam import Program
+from common.tokens.abstract_tokens import InvalidTransition
+from common.tokens.control_tokens import LoopIterationLimitReached, StepLimitReached
+from search.deadline import Deadline
+
+
+def distance(output: Environment, expected: Environment) -> float:
+    """Loss of an example: the distance of the output to the desired output."""
+    return output.distance(expected)
+
+
+def distance_with_penalty(output: Environment, expected: Environment) -> float:
+    """Loss of an example: the distance of the output to the desired output, plus 1 if the output is not correct."""
+    return output.distance(expected) + (0 if output.correct(expected) else 1)
+
+
+def run_program(program: Program, env: Environment) -> Environment:
+    """Runs a Program on an Environment, which is altered."""
+    return program.interp_in_place(env)
+
+
+class Evaluator:
+    """Evaluates programs on a fixed list of examples. All search algorithms evaluate their programs through an
+    Evaluator, such that interpretation, exception handling, caching and the time spent evaluating are dealt with in
+    one place. How a program is run, the loss of an example and whether losses are summed or averaged can be chosen.
+
+    An evaluation stops as soon as the outcome is known: when the program raises an exception on an example, or when
+    the cost exceeds a given bound. The examples are tried in order of how often they ended an evaluation early, such
+    that failing programs tend to be rejected after running on a single example.
+
+    Programs are run on the input environments themselves, which are restored afterwards through their checkpoints."""
+
+    def __init__(self, examples: list[Example], loss: Callable[[Environment, Environment], float] = distance,
+                 mean: bool = False, run: Callable[[object, Environment], Environment] = run_program,
+                 cache_size: int = 0, key: Callable[[object], Hashable] = Program.key):
+        """Creates an Evaluator for 'examples'. The cost of a program is the sum of the 'loss' over the examples, or
+        the mean if 'mean' is set. Programs are run through 'run'. If 'cache_size' is positive, the results of that
+        many programs are cached, identified by 'key'."""
+        self.examples = list(examples)
+        self.loss = loss
+        self.mean = mean
+        self.run = run
+        self.key = key
+        self._cache: Union[LRUCache, None] = LRUCache(cache_size) if cache_size > 0 else None
+
+        # If set, every evaluation first checks this deadline, raising DeadlineReached once it has passed.
+        self.deadline: Union[Deadline, None] = None
+
+        self._order = list(range(len(self.examples)))
+        self._exits = [0] * len(self.examples)  # for each example: the number of evaluations it ended early
+
+        self.evaluations = 0
+        self.early_exits = 0
+        self.time = 0.0
+        self.steps = 0  # loop iterations executed, see Environment.steps
+        self.step_limit_reached = 0  # executions that ran out of steps
+
+    def evaluate(self, program, bound: float = math.inf) -> tuple[float, bool]:
+        """Returns the cost of 'program' and whether it solves all examples. The cost is infinite if the program raises
+        an exception on one of the examples. Once the cost exceeds 'bound', the remaining examples are skipped and the
+        cost so far, which is a lower bound of the cost, is returned, and the program is reported as not solved."""
+        if self._cache is None:
+            return self._evaluate(program, bound)[:2]
+
+        key = self.key(program)
+        cached = self._cache.get(key)
+        # A cached lower bound only settles the evaluation if it exceeds the bound as well.
+        if cached is not None and (cached[2] or cached[0] > bound):
+            return cached[:2]
+
+        result = self._evaluate(program, bound)
+        self._cache.put(key, result)
+        return result[:2]
+
+    def losses(self, program) -> tuple[list[float], bool]:
+        """Returns the loss of 'program' on every example, in the order of the examples, and whether it solves all of
+        them. The loss is infinite on examples on which the program raises an exception, and the other examples are
+        still evaluated."""
+        if self.deadline is not None:
+            self.deadline.check()
+        self.evaluations += 1
+        start = time.perf_counter()
+        losses = []
+        solved = True
+
+        for example in self.examples:
+            env = example.input_environment
+            marker = env.checkpoint()
+            try:
+                output = self._run(program, env)
+                losses.append(self.loss(output, example.output_environment))
+                solved = solved and output.correct(example.output_environment)
+            except (InvalidTransition, LoopIterationLimitReached):
+                losses.append(math.inf)
+                solved = False
+            finally:
+                env.rollback(marker)
+
+        self.time += time.perf_counter() - start
+        return losses, solved
+
+    def outputs(self, program) -> tuple[Environment]:
+        """Returns the environments resulting from running 'program' on copies of the inputs, for algorithms that keep
+        them. Raises InvalidTransition or LoopIterationLimitReached if the program fails on one of the examples."""
+        if self.deadline is not None:
+            self.deadline.check()
+        self.evaluations += 1
+        start = time.perf_counter()
+        try:
+            return tuple(self._run(program, copy.deepcopy(e.input_environment)) for e in self.examples)
+        finally:
+            self.time += time.perf_counter() - start
+
+    def cost_of(self, outputs: tuple[Environment]) -> tuple[float, bool]:
+        """Returns the cost of the given outputs (as returned by 'outputs') and whether they solve all examples."""
+        cost = 0
+        solved = True
+        for output, example in zip(outputs, self.examples):
+            cost += self.loss(output, example.output_environment)
+            solved = solved and output.correct(example.output_environment)
+        return (cost / len(self.examples) if self.mean else cost), solved
+
+    def _evaluate(self, program, bound: float) -> tuple[float, bool, bool]:
+        """Returns the cost, whether all examples are solved and whether all examples were evaluated."""
+        if self.deadline is not None:
+            self.deadline.check()
+        self.evaluations += 1
+        start = time.perf_counter()
+        # The bound on the summed losses.
+        bound = bound * len(self.examples) if self.mean else bound
+        cost = 0
+        solved = True
+
+        try:
+            for position, index in enumerate(self._order):
+                example = self.examples[index]
+                env = example.input_environment
+                marker = env.checkpoint()
+                try:
+                    output = self._run(program, env)
+                    cost += self.loss(output, example.output_environment)
+                    solved = solved and output.correct(example.output_environment)
+                except (InvalidTransition, LoopIterationLimitReached):
+                    self._exit(position)
+                    return math.inf, False, True
+                finally:
+                    env.rollback(marker)
+
+                if cost > bound:
+                    self._exit(position)
+                    if position < len(self._order) - 1:
+                        return (cost / len(self.examples) if self.mean else cost), False, False
+        finally:
+            self.time += time.perf_counter() - start
+
+        return (cost / len(self.examples) if self.mean else cost), solved, True
+
+    def _run(self, program, env: Environment) -> Environment:
+        """Runs 'program' on 'env' in place through 'run', counting the loop iterations it executes."""
+        try:
+            return self.run(program, env)
+        except StepLimitReached:
+            self.step_limit_reached += 1
+            raise
+        finally:
+            self.steps += env.steps
+
+    def _exit(self, position: int):
+        """Records that the example at 'position' in the order ended an evaluation, and moves it forward past the
+        examples that ended fewer evaluations."""
+        order, exits = self._order, self._exits
+
+        if position < len(order) - 1:
+            self.early_exits += 1
+        exits[order[position]] += 1
+
+        while position > 0 and exits[order[position - 1]] < exits[order[position]]:
+            order[position - 1], order[position] = order[position], order[position - 1]
+            position -= 1
+
+    def stats(self) -> dict:
+        """Returns the number of evaluations, the number of them that skipped at least one example, the time spent
+        evaluating in seconds, the loop iterations executed, the number of executions that ran out of steps and, if
+        results are cached, the counters of the cache."""
+        stats = {"evaluations": self.evaluations, "early_exits": self.early_exits, "time": self.time,
+                 "steps": self.steps, "step_limit_reached": self.step_limit_reached}
+        if self._cache is not None:
+            for k, v in self._cache.stats().items():
+                stats["cache_" + k] = v
+        return stats
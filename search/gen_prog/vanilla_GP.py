@@ -8,7 +8,9 @@ from common.prorgam import Program
 from common.tokens.abstract_tokens import InvalidTransition, Token
 from common.tokens.control_tokens import LoopIterationLimitReached
 from search.abstract_search import SearchAlgorithm
-from search.invent import invent2
+from search.evaluator import Evaluator
+from search.invent import iterInvent2, prune_equivalent
+from search.token_library import invent2_library
 
 from typing import List
 from math import inf
@@ -132,24 +134,13 @@ class VanillaGP(SearchAlgorithm):
 		
 	# -- Fitness --
 	def evaluate_program(self, program):
-		try:
-			cum_loss = 0.0
-			solved = True
-			for example in self.training_examples:
-				input = example.input_environment
-				output = example.output_environment
-				program_output = program.interp(input)
-				cum_loss += program_output.distance(output)
-				solved = solved and program_output.correct(output)
-			if (solved):
-				error = 0
-				return (error, program)
-			else:
-				error = cum_loss
-				# print(solved)
-				return (error, program)
-		except (InvalidTransition, LoopIterationLimitReached) as e:
-			error = float("inf")
+		# The error is infinite as soon as the program fails on one of the examples, which the evaluator tries first
+		cum_loss, solved = self.evaluator.evaluate(program)
+		if (solved):
+			error = 0
+			return (error, program)
+		else:
+			error = cum_loss
 			return (error, program)
 
 	def gen_error(self):
@@ -414,8 +405,12 @@ class VanillaGP(SearchAlgorithm):
 		return super().extend_result(search_result)
 
 	def setup(self, training_examples: List[Example], trans_tokens: set[Token], bool_tokens: set[Token]):
-		self.token_functions =  [token for token in list(trans_tokens)] + invent2(trans_tokens, bool_tokens, self.MAX_TOKEN_FUNCTION_DEPTH)
+		if self.prune_equivalent_tokens:
+			self.token_functions = prune_equivalent(itertools.chain(trans_tokens, iterInvent2(trans_tokens, bool_tokens, self.MAX_TOKEN_FUNCTION_DEPTH)), [e.input_environment for e in training_examples], trans_tokens)
+		else:
+			self.token_functions =  [token for token in list(trans_tokens)] + invent2_library(trans_tokens, bool_tokens, self.MAX_TOKEN_FUNCTION_DEPTH)
 		self.training_examples = training_examples
+		self.evaluator = Evaluator(training_examples)
 
 		# Set the overall best results to the performance of the initial (empty) best program Program([])
 		self._best_error, self._best_program = self.evaluate_program(self._best_program)
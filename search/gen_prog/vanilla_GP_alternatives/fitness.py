@@ -1,37 +1,33 @@
 
 import math
+
+import numpy as np
+
 from common.tokens.abstract_tokens import InvalidTransition
 from common.tokens.control_tokens import LoopIterationLimitReached
+from search.evaluator import Evaluator
 
 # ------------------------------------------------ Start original code ------------------------------------------------
 
 
-def evaluate_program(program, training_examples):
-    try:
-        cum_loss = 0.0
-        solved = True
-        for example in training_examples:
-            input = example.input_environment
-            output = example.output_environment
-            program_output = program.interp(input)
-            cum_loss += program_output.distance(output)
-            solved = solved and program_output.correct(output)
-        if (solved):
-            error = 0
-            return (error, program)
-        else:
-            error = cum_loss
-            # print(solved)
-            return (error, program)
-    except (InvalidTransition, LoopIterationLimitReached) as e:
-        error = float("inf")
+def evaluate_program(program, training_examples, evaluator=None):
+    # The evaluation stops at the first example on which the program fails, and tries the examples on which programs
+    # fail most often first if the same evaluator is reused.
+    if evaluator is None:
+        evaluator = Evaluator(training_examples)
+    cum_loss, solved = evaluator.evaluate(program)
+    if (solved):
+        error = 0
+        return (error, program)
+    else:
+        error = cum_loss
         return (error, program)
 
 
-def gen_error(current_gen, training_examples):
+def gen_error(current_gen, training_examples, evaluator=None):
     current_gen_error = []
     for program in current_gen:
-        program_error = evaluate_program(program, training_examples)
+        program_error = evaluate_program(program, training_examples, evaluator)
         current_gen_error.append(program_error)
     current_gen_error = sorted(current_gen_error)
 
@@ -80,3 +76,35 @@ def program_error_example(program, example):
     except (InvalidTransition, LoopIterationLimitReached) as e:
         error = float("inf")
         return error
+
+
+def example_error(output, expected):
+    """The loss of an example as computed by program_error_example: 0 if the output is correct, its distance otherwise."""
+    return 0 if output.correct(expected) else output.distance(expected)
+
+
+def error_matrix(programs, training_examples, evaluator=None):
+    """Evaluates a whole population at once. Returns a matrix of which entry [i, j] is the error of programs[i] on
+    training_examples[j], as computed by program_error_example, together with an array telling for every program
+    whether it solves all examples. The programs are evaluated by 'evaluator', which must use example_error as its
+    loss, or by a new Evaluator for 'training_examples' if it is not given.
+
+    Unlike gen_error, every program is evaluated on every example, even after it failed on one of them. This pays off
+    when the per-example errors are needed anyway, as for lexicase selection."""
+    if evaluator is None:
+        evaluator = Evaluator(training_examples, loss=example_error)
+    errors = np.empty((len(programs), len(training_examples)))
+    solved = np.empty(len(programs), dtype=bool)
+
+    for i, program in enumerate(programs):
+        errors[i], solved[i] = evaluator.losses(program)
+
+    return errors, solved
+
+
+def gen_error_from_matrix(current_gen, errors, solved):
+    """Returns the same as gen_error, given the result of error_matrix for 'current_gen'."""
+    totals = errors.sum(axis=1).tolist()
+    current_gen_error = [(0 if s else total, program) for total, s, program in zip(totals, solved.tolist(), current_gen)]
+
+    return sorted(current_gen_error)
@@ -2,6 +2,8 @@
 
 import copy
 
+import numpy as np
+
 from search.gen_prog.vanilla_GP_alternatives import general
 from search.gen_prog.vanilla_GP_alternatives import fitness
 
@@ -120,85 +122,63 @@ def roulette_wheel_selection(gen):
     return intermediate_gen
 
 
-def find_best_error(current_gen, example):
-    best = float("inf")
-    current_gen_errors = []
-    for program in current_gen:
-        error = fitness.program_error_example(program, example)
-        current_gen_errors.append(error)
-        if error < best:
-            best = error
-    return (best, current_gen_errors)
-
-
-def find_with_error(current_gen, current_gen_errors, error):
-    programs_with_error = []
-    for i in range(len(current_gen_errors)):
-        if current_gen_errors[i] == error:
-            programs_with_error.append(current_gen[i])
-    return programs_with_error
-
-
-def lexicase(current_gen, training_examples):
-    examples = copy.deepcopy(training_examples)
-    random.shuffle(examples)
+def lexicase(current_gen, errors, max_cases=None):
+    """Selects a program from 'current_gen' by lexicase selection, given the error matrix of the generation as computed
+    by fitness.error_matrix. The examples are considered in random order, and for each of them only the candidates with
+    the lowest error on that example are kept. At most 'max_cases' examples are considered."""
+    candidates = np.arange(len(current_gen))
+    cases = list(range(errors.shape[1]))
+    random.shuffle(cases)
 
-    while (len(current_gen) > 1) and (len(examples) > 0):
-        example = examples.pop(0)
-        (best_error, current_gen_errors) = find_best_error(current_gen, example)
-        current_gen = find_with_error(current_gen, current_gen_errors, best_error)
+    for case in cases[:max_cases]:
+        if len(candidates) <= 1:
+            break
+        case_errors = errors[candidates, case]
+        candidates = candidates[case_errors == case_errors.min()]
 
-    if len(current_gen) == 1:
-        return current_gen[0]
+    if len(candidates) == 1:
+        return current_gen[candidates[0]]
     else:
-        return random.choice(current_gen)
+        return current_gen[random.choice(candidates)]
 
 
-def selection_lexicase(current_gen, training_examples):
+def selection_lexicase(current_gen, training_examples, errors=None):
+    if errors is None:
+        errors, _ = fitness.error_matrix(current_gen, training_examples)
+
     N = len(current_gen)
 
     intermediate_gen = []
     for i in range(N):
-        intermediate_gen.append(lexicase(current_gen, training_examples))
+        intermediate_gen.append(lexicase(current_gen, errors))
 
     return intermediate_gen
 
 
-def downsampled_lexicase(current_gen, training_examples):
-    examples = copy.deepcopy(training_examples)
-    random.shuffle(examples)
-
-    count = 0
+def downsampled_lexicase(current_gen, errors):
+    return lexicase(current_gen, errors, max_cases=5)
 
-    while (len(current_gen) > 1) and (len(examples) > 0) and (count < 5):
-        example = examples.pop(0)
-        (best_error, current_gen_errors) = find_best_error(current_gen, example)
-        current_gen = find_with_error(current_gen, current_gen_errors, best_error)
-        count += 1
-
-    if len(current_gen) == 1:
-        return current_gen[0]
-    else:
-        return random.choice(current_gen)
 
+def downsampled_lexicase_selection(current_gen, training_examples, errors=None):
+    if errors is None:
+        errors, _ = fitness.error_matrix(current_gen, training_examples)
 
-def downsampled_lexicase_selection(current_gen, training_examples):
     N = len(current_gen)
 
     intermediate_gen = []
     for i in range(N):
-        intermediate_gen.append(downsampled_lexicase(current_gen, training_examples))
+        intermediate_gen.append(downsampled_lexicase(current_gen, errors))
 
     return intermediate_gen
 
 
-def combined_lexicase_selection(current_gen, training_examples, current_gen_fitness):
+def combined_lexicase_selection(current_gen, training_examples, current_gen_fitness, errors=None):
     training_size = len(training_examples)
 
     if training_size <= 4:
         return stochastic_universal_sampling(current_gen_fitness)
     else:
-        return selection_lexicase(current_gen, training_examples)
+        return selection_lexicase(current_gen, training_examples, errors)
 
 
 def tournament_selection_selection(current_gen_fitness):
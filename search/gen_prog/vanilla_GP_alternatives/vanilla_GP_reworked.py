@@ -12,9 +12,12 @@ import statistics
 import random, itertools
 from common.experiment import Example
 from common.prorgam import Program
+from common.simplifier import simplify
 from common.tokens.abstract_tokens import Token
 from search.abstract_search import SearchAlgorithm
-from search.invent import invent2
+from search.evaluator import Evaluator
+from search.invent import iterInvent2, prune_equivalent
+from search.token_library import invent2_library
 
 from typing import List
 
@@ -30,6 +33,10 @@ class SelectionMethods(enum.Enum):
     Truncation = 8
 
 
+# Selection methods that select on the errors of the programs per example.
+LEXICASE_METHODS = {SelectionMethods.Lexicase, SelectionMethods.DownsampledLexicase, SelectionMethods.CombinedLexicase}
+
+
 class CrossoverMethods(enum.Enum):
     OnePoint = 1
     NPoint = 2
@@ -64,6 +71,7 @@ class VanillaGPReworked(SearchAlgorithm):
     token_functions = []
     loop_token_functions = []
     mutation_chance = 2  # Chance of an individual gene(function) being mutated (may be changed to be random for each mutation(?))
+    simplify_offspring = False  # Whether mutated programs are simplified into equivalent shorter programs
 
     # Dynamic fields
     current_gen_num = 0
@@ -100,13 +108,15 @@ class VanillaGPReworked(SearchAlgorithm):
             new_gen = selection.roulette_wheel_selection(gen)
 
         elif self.selection_type == SelectionMethods.Lexicase:
-            new_gen = selection.selection_lexicase(self.current_gen, self.training_examples)
+            new_gen = selection.selection_lexicase(self.current_gen, self.training_examples, self.current_gen_errors)
 
         elif self.selection_type == SelectionMethods.DownsampledLexicase:
-            new_gen = selection.downsampled_lexicase_selection(self.current_gen, self.training_examples)
+            new_gen = selection.downsampled_lexicase_selection(self.current_gen, self.training_examples,
+                                                               self.current_gen_errors)
 
         elif self.selection_type == SelectionMethods.CombinedLexicase:
-            new_gen = selection.combined_lexicase_selection(self.current_gen, self.training_examples, gen)
+            new_gen = selection.combined_lexicase_selection(self.current_gen, self.training_examples, gen,
+                                                            self.current_gen_errors)
 
         elif self.selection_type == SelectionMethods.Tournament:
             new_gen = selection.tournament_selection_selection(gen)
@@ -182,6 +192,9 @@ class VanillaGPReworked(SearchAlgorithm):
         elif self.mutation_type == MutationMethods.AlteredOneMutationLoops:
             mutated_gen = [mutation.one_mutation_mutation_altered_higher_loop_chance(program, self.token_functions, self.loop_token_functions) for program in gen]
 
+        if self.simplify_offspring:
+            mutated_gen = [simplify(program) for program in mutated_gen]
+
         return mutated_gen
 
     # -- Breed Next Generation
@@ -202,17 +215,27 @@ class VanillaGPReworked(SearchAlgorithm):
         return super().extend_result(search_result)
 
     def setup(self, training_examples: List[Example], trans_tokens: set[Token], bool_tokens: set[Token]):
-        self.token_functions = [token for token in list(trans_tokens)] + invent2(trans_tokens, bool_tokens,
-                                                                                 self.MAX_TOKEN_FUNCTION_DEPTH)
+        if self.prune_equivalent_tokens:
+            self.token_functions = prune_equivalent(
+                itertools.chain(trans_tokens, iterInvent2(trans_tokens, bool_tokens, self.MAX_TOKEN_FUNCTION_DEPTH)),
+                [e.input_environment for e in training_examples], trans_tokens)
+        else:
+            self.token_functions = [token for token in list(trans_tokens)] + \
+                invent2_library(trans_tokens, bool_tokens, self.MAX_TOKEN_FUNCTION_DEPTH)
 
         for token in self.token_functions:
             if "while" in token.to_formatted_string():
                 self.loop_token_functions.append(token)
 
         self.training_examples = training_examples
+        self.evaluator = Evaluator(training_examples)
+        # Computes the error matrix for lexicase selection, until the time limit of the search.
+        self.error_evaluator = Evaluator(training_examples, loss=fitness.example_error)
+        self.error_evaluator.deadline = self.deadline
 
         # Set the overall best results to the performance of the initial (empty) best program Program([])
-        self._best_error, self._best_program = fitness.evaluate_program(self._best_program, self.training_examples)
+        self._best_error, self._best_program = fitness.evaluate_program(self._best_program, self.training_examples,
+                                                                            self.evaluator)
 
         # Record the initial error (error of the empty program) in the SearchResult
         self.initial_error = self._best_error
@@ -238,8 +261,16 @@ class VanillaGPReworked(SearchAlgorithm):
     def iteration(self, training_example: List[Example], trans_tokens: set[Token], bool_tokens: set[Token]) -> bool:
         # Collect statistics about generation
 
-        # Calculate the error for each program in the current generation
-        current_gen_error = fitness.gen_error(self.current_gen, self.training_examples)
+        # Calculate the error for each program in the current generation. Lexicase selection needs the error of every
+        # program on every example, in which case these are computed once for the whole generation.
+        if self.selection_type in LEXICASE_METHODS:
+            self.current_gen_errors, current_gen_solved = fitness.error_matrix(self.current_gen,
+                                                                               self.training_examples,
+                                                                               self.error_evaluator)
+            current_gen_error = fitness.gen_error_from_matrix(self.current_gen, self.current_gen_errors,
+                                                              current_gen_solved)
+        else:
+            current_gen_error = fitness.gen_error(self.current_gen, self.training_examples, self.evaluator)
 
         self.number_of_explored_programs += len(self.current_gen)
 
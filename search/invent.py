@@ -1,73 +1,159 @@
+import copy
 import itertools
-from common.tokens.control_tokens import If, LoopWhile
+import math
+from common.environment import Environment
+from common.tokens.control_tokens import If, LoopWhile, LoopIterationLimitReached
 from common.tokens.string_tokens import *
 
+# Default number of probe tokens applied to the inputs to obtain the environments on which tokens are compared.
+PROBE_DEPTH = 2
 
-# Generates all permutations of elements in a set where maxLength > len(per) > 1
+
+# Returns the given tokens in a deterministic order: lists and tuples keep their order, sets are sorted by name, as their
+# iteration order depends on the addresses of the tokens.
+def _ordered(tokenSet) -> list:
+    if isinstance(tokenSet, (list, tuple)):
+        return list(tokenSet)
+    return sorted(tokenSet, key=str)
+
+
+# Generates all permutations of elements in a set where maxLength >= len(per) >= 1, longest permutations first
+def iterPermutations(set, maxLength):
+    elements = _ordered(set)
+    for length in range(maxLength, 0, -1):
+        yield from itertools.permutations(elements, length)
+
+
+# Returns all permutations of elements in a set where maxLength >= len(per) >= 1, in the order of iterPermutations
 def generatePermutations(set, maxLength) -> list:
-    if (maxLength <= 0):
-        return []
-    return list(itertools.permutations(set, maxLength)) + generatePermutations(set, maxLength - 1)
+    return list(iterPermutations(set, maxLength))
 
 
-# Composes tokens into Invented tokens
-# Returns a list of Invented tokens
-def inventTokens(tokenSet, maxLength) -> list:
-    perms = generatePermutations(tokenSet, maxLength)
-    out = []
+# Returns the number of permutations generated by iterPermutations for a set of the given size
+def countPermutations(size, maxLength) -> int:
+    return sum(math.perm(size, length) for length in range(1, maxLength + 1))
+
 
-    # convert these into "invented tokens"
-    for p in perms:
+# Composes tokens into Invented tokens
+# Generates the Invented tokens, and the tokens themselves for permutations of length 1
+def iterInventedTokens(tokenSet, maxLength):
+    for p in iterPermutations(tokenSet, maxLength):
         if len(p) > 1:
-            p = list(map(lambda x: x, p))
-            out.append(InventedToken(p))
+            yield InventedToken(list(p))
         else:
-            out.append(p[0])
+            yield p[0]
+
 
-    return out
+# Composes tokens into Invented tokens
+# Returns a list of Invented tokens
+def inventTokens(tokenSet, maxLength) -> list:
+    return list(iterInventedTokens(tokenSet, maxLength))
 
 
 # Composes tokens into more elaborate Invented tokens
-# Also generates If and While tokens
-def invent2(tokenSet, boolTokenSet, maxLength) -> list:
+# Also generates If and While tokens. The tokens are generated lazily, in the same order as invent2 returns them.
+def iterInvent2(tokenSet, boolTokenSet, maxLength):
     # Normal invention step
-    out = inventTokens(tokenSet, maxLength)
+    yield from iterInventedTokens(tokenSet, maxLength)
+
+    # The bodies are reused for every condition, so only these are materialized
+    conditions = _ordered(boolTokenSet)
+    bodies = inventTokens(tokenSet, _bodyLength(maxLength))
 
     # Generating if statements
-    if_list = []
-    conditions = boolTokenSet
-    bodies = inventTokens(tokenSet, max(1, int(maxLength / 2)))  # TODO Arbitrary length!!
     for c in conditions:
         for lb in bodies:
             for rb in bodies:
-                if_list.append(If(c, [lb], [rb]))
-    out = out + if_list
+                yield If(c, [lb], [rb])
 
     # Generating recurse statements
-    # recurse_list = []
-    # conditions = boolTokenSet
-    # conditions
-    # bodies = inventTokens(tokenSet, max(1, int(maxLength / 2)))  # TODO Arbitrary length!!
     # for c in conditions:
     #     for lb in bodies:
     #         for rb in bodies:
-    #             recurse_list.append(Recurse(c(), [lb], [rb]))
-    #         recurse_list.append(Recurse(c(), [lb], []))
-    #         recurse_list.append(Recurse(c(), [], [lb]))
+    #             yield Recurse(c(), [lb], [rb])
+    #         yield Recurse(c(), [lb], [])
+    #         yield Recurse(c(), [], [lb])
 
     # for lb in bodies:
     #     for rb in bodies:
-    #         recurse_list.append(Recurse(None, [lb], [rb]))
-    #     recurse_list.append(Recurse(None, [lb], []))
-    #     recurse_list.append(Recurse(None, [], [lb]))
-    # out = out + recurse_list
-    loop_list = []
-    bodies = inventTokens(tokenSet, max(1, int(maxLength / 2)))  # TODO Arbitrary length!!
+    #         yield Recurse(None, [lb], [rb])
+    #     yield Recurse(None, [lb], [])
+    #     yield Recurse(None, [], [lb])
+
+    # Generating loop statements
     for c in conditions:
         for lb in bodies:
-            loop_list.append(LoopWhile(c, [lb]))
-    out = out + loop_list
-    return out
+            yield LoopWhile(c, [lb])
+
+
+# Composes tokens into more elaborate Invented tokens
+# Also generates If and While tokens
+def invent2(tokenSet, boolTokenSet, maxLength) -> list:
+    return list(iterInvent2(tokenSet, boolTokenSet, maxLength))
+
+
+# Returns the number of tokens generated by invent2, without generating them
+def countInvent2(tokenSet, boolTokenSet, maxLength) -> int:
+    size = len(tokenSet)
+    bodies = countPermutations(size, _bodyLength(maxLength))
+    return countPermutations(size, maxLength) + len(boolTokenSet) * (bodies * bodies + bodies)
+
+
+def _bodyLength(maxLength) -> int:
+    return max(1, int(maxLength / 2))  # TODO Arbitrary length!!
+
+
+# Returns the tokens that are not observationally equivalent to another token in the given list.
+# Tokens are equivalent if they yield the same environments (or both fail) on every probe environment. The probes are the
+# given input environments and the environments that are at most 'probe_depth' of the given probe tokens away from them,
+# such that tokens that only coincide on the inputs themselves are kept. Of every group of equivalent tokens, the one
+# with the fewest tokens is kept (the first one if tied), and the kept tokens stay in their original order. The tokens may
+# be given by any iterable, e.g. iterInvent2, which is consumed once without keeping the pruned tokens in memory.
+def prune_equivalent(tokens, input_envs: list[Environment], probe_tokens=(), probe_depth: int = PROBE_DEPTH) -> list:
+    probes = {}  # the probe environments, in order of discovery
+    for env in input_envs:
+        probes.setdefault(copy.deepcopy(env))
+    frontier = list(probes)
+    for _ in range(probe_depth):
+        reached = []
+        for env in frontier:
+            for token in probe_tokens:
+                try:
+                    probe = token.apply(copy.deepcopy(env))
+                except (InvalidTransition, LoopIterationLimitReached):
+                    continue
+                if probe not in probes:
+                    probes[probe] = None
+                    reached.append(probe)
+        frontier = reached
+    probes = list(probes)
+    for probe in probes:
+        # the tokens are compared on the probes as if these were inputs, with the full step budget
+        probe.steps = 0
+
+    representatives = {}  # for each signature: (index, token) of the token with the fewest tokens
+    for index, token in enumerate(tokens):
+        signature = _signature(token, probes)
+        kept = representatives.get(signature)
+        if kept is None or token.number_of_tokens() < kept[1].number_of_tokens():
+            representatives[signature] = index, token
+
+    return [token for _, token in sorted(representatives.values(), key=lambda kept: kept[0])]
+
+
+def _signature(token, envs: list[Environment]) -> tuple:
+    signature = []
+    for env in envs:
+        marker = env.checkpoint()
+        try:
+            # the resulting environment itself, copied before the rollback, such that equal hashes are not mistaken for
+            # equal environments
+            signature.append(copy.deepcopy(token.apply(env)))
+        except (InvalidTransition, LoopIterationLimitReached):
+            signature.append(None)
+        finally:
+            env.rollback(marker)
+    return tuple(signature)
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ from common.tokens.abstract_tokens import InvalidTransition, Token
 from common.prorgam import Program
 from common.experiment import Example, TestCase
 from search.abstract_search import SearchAlgorithm
+from search.evaluator import Evaluator
 from common.tokens.control_tokens import If, LoopIterationLimitReached, LoopWhile
 import random
 import math
@@ -52,6 +53,7 @@ class MetropolisHasting(SearchAlgorithm):
         self._best_program: Program = Program([])
         self.cost = 100
         self.proposal_distribution = ProposalDistribution()
+        self.evaluator = Evaluator(examples)
 
         # See if there is a way to systematically add all tokens
         fac = MutationFactory()
@@ -76,7 +78,7 @@ class MetropolisHasting(SearchAlgorithm):
         forward_transition, backward_transition = self.calc_transition_probabilities(mut)
 
         self._best_program, newcost, solved = MetropolisHasting.maybe_apply_mutation(
-            examples, self._best_program, self.cost, mut, forward_transition, backward_transition, self.params['alpha'], self.params['type'])
+            self.evaluator, self._best_program, self.cost, mut, forward_transition, backward_transition, self.params['alpha'], self.params['type'])
 
         if (newcost != self.cost):
             self.cost_per_iteration.append((self.number_of_iterations, newcost))
@@ -130,39 +132,29 @@ class MetropolisHasting(SearchAlgorithm):
 
 
     @staticmethod
-    def maybe_apply_mutation(examples: List[Example], old_program: Program, ocost: int, mut: Mutation,
+    def maybe_apply_mutation(evaluator: Evaluator, old_program: Program, ocost: int, mut: Mutation,
                              forward_transition, backward_transition, alpha: float, type: str) -> Tuple[Program, int, int]:
         new_program = mut.apply(old_program)
-        try:
-            cost = 0
 
-            for case in examples:
-                nenv = new_program.interp(case.input_environment)
-                cost += abs(nenv.distance(case.output_environment))
-            solved = False
+        # Default is Random Walk - Metropolis
+        ratio_factor = 1 if type == "metropolis" else backward_transition / forward_transition
 
-            # 0.1 for rounding errors, all distance measures should return integer values
-            if cost < 0.1:
-                solved = True
-                for case in examples:
-                    nenv = new_program.interp(case.input_environment)
-                    solved = solved and nenv.correct(case.output_environment)
-
-            # Default is Random Walk - Metropolis
-            ratio = math.exp(-alpha * cost) / math.exp(-alpha * ocost)
-            if type != "metropolis":
-                ratio *= backward_transition / forward_transition
-
-            if ratio > 1:
-                return new_program, cost, solved
-            if random.random() < ratio:
-                return new_program, cost, solved
-            return old_program, ocost, False
+        # The new program is accepted if exp(-alpha * cost) / exp(-alpha * ocost) * ratio_factor > u. Drawing u first
+        # gives the largest cost that can be accepted, such that the evaluation can stop as soon as the cost exceeds it.
+        u = random.random()
+        if u == 0 or ratio_factor == 0 or alpha <= 0:
+            bound = math.inf if ratio_factor > u else -math.inf
+        else:
+            bound = ocost + (math.log(ratio_factor) - math.log(u)) / alpha
 
-        except(InvalidTransition, LoopIterationLimitReached):
-            return old_program, ocost, False
+        cost, solved = evaluator.evaluate(new_program, bound)
 
+        # 0.1 for rounding errors, all distance measures should return integer values
+        solved = solved and cost < 0.1
 
+        if cost < bound:
+            return new_program, cost, solved
+        return old_program, ocost, False
 
 
 class ProposalDistribution():
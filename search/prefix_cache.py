@@ -0,0 +1,87 @@
+import copy
+from typing import Hashable, Union
+
+from common.environment import Environment, STEP_LIMIT
+from common.lru_cache import LRUCache
+from common.prorgam import Program
+from common.tokens.abstract_tokens import InvalidTransition, Token
+from common.tokens.control_tokens import LoopIterationLimitReached
+from search.transposition_table import TranspositionTable
+
+# Default maximum number of prefixes of which the resulting environments are cached.
+PREFIX_CACHE_SIZE = 10000
+
+
+class PrefixCache:
+    """Caches the environments that result from running program prefixes on the input environments, together with
+    their distances to the desired output environments. A program that extends a cached prefix by a single token can
+    then be evaluated by applying only that token, instead of interpreting the whole program again.
+
+    Prefixes are identified by a key, e.g. the tuple of the indices of its tokens in a token library, such that the key
+    of a child prefix is the key of its parent extended by one element. The number of cached prefixes is bounded: the
+    least recently used ones are evicted, and recomputed when needed again.
+
+    The cached environments keep the loop iterations executed by their prefix, so a prefix and its extensions are
+    bounded by 'step_limit' as a whole, as when interpreting them as a single Program."""
+
+    def __init__(self, input_envs: tuple[Environment], output_envs: tuple[Environment],
+                 capacity: int = PREFIX_CACHE_SIZE, step_limit: int = STEP_LIMIT):
+        self.input_envs = tuple(input_envs)
+        self.output_envs = tuple(output_envs)
+        self.step_limit = step_limit
+        self._entries = LRUCache(capacity)
+
+    def resolve(self, key: tuple[Hashable], tokens: list[Token]) -> Union[tuple[tuple[Environment], tuple[float]], None]:
+        """Returns the resulting environments and their distances of the prefix identified by 'key', of which the
+        sequence of tokens is 'tokens'. These are derived from the parent prefix if that one is cached, otherwise the
+        whole prefix is interpreted. Returns None if the prefix cannot be applied to the input environments."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        parent = self._entries.get(key[:-1]) if key else None
+
+        try:
+            if parent is not None:
+                parent_states, parent_distances = parent
+                states = tuple(tokens[-1].apply(copy.deepcopy(s)) for s in parent_states)
+                distances = tuple(s.incremental_distance(o, p, d) for s, o, p, d in
+                                  zip(states, self.output_envs, parent_states, parent_distances))
+            else:
+                program = Program(tokens, step_limit=self.step_limit)
+                states = tuple(program.interp(e) for e in self.input_envs)
+                distances = tuple(s.distance(o) for s, o in zip(states, self.output_envs))
+        except (InvalidTransition, LoopIterationLimitReached):
+            return None
+
+        entry = (states, distances)
+        self._entries.put(key, entry)
+        return entry
+
+    def evaluate(self, parent: tuple[tuple[Environment], tuple[float]], token: Token,
+                 transpositions: TranspositionTable = None) -> tuple[float, bool]:
+        """Returns the summed distance and whether all examples are solved for the prefix 'parent' (as returned by
+        'resolve') extended by 'token'. The cost is infinite if the token cannot be applied, or if the resulting
+        environments were reached before according to the optional 'transpositions' table."""
+        parent_states, parent_distances = parent
+        children = []
+
+        try:
+            for state in parent_states:
+                children.append(token.apply(copy.deepcopy(state)))
+        except (InvalidTransition, LoopIterationLimitReached):
+            return float("inf"), False
+
+        if transpositions is not None and transpositions.visit(children):
+            return float("inf"), False
+
+        cost = 0
+        solved = True
+        for child, state, output, distance in zip(children, parent_states, self.output_envs, parent_distances):
+            cost += child.incremental_distance(output, state, distance)
+            solved = solved and child.correct(output)
+
+        return cost, solved
+
+    def stats(self) -> dict:
+        return self._entries.stats()
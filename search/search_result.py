@@ -11,7 +11,11 @@ class SearchResult:
             process_time_sec: float,
             number_of_explored_programs: int,
             cost_per_iteration: List[Tuple[int, float]],
-            number_of_iterations: int
+            number_of_iterations: int,
+            distance_cache_stats: dict = None,
+            transposition_table_stats: dict = None,
+            evaluator_stats: dict = None,
+            deadline_stats: dict = None
     ):
         self.dictionary = {
             'program': program,
@@ -21,3 +25,19 @@ class SearchResult:
             'cost_per_iteration': cost_per_iteration,
             'number_of_iterations': number_of_iterations,
         }
+
+        if distance_cache_stats is not None:
+            for k, v in distance_cache_stats.items():
+                self.dictionary['distance_cache_' + k] = v
+
+        if transposition_table_stats is not None:
+            for k, v in transposition_table_stats.items():
+                self.dictionary['transposition_table_' + k] = v
+
+        if evaluator_stats is not None:
+            for k, v in evaluator_stats.items():
+                self.dictionary['evaluator_' + k] = v
+
+        if deadline_stats is not None:
+            for k, v in deadline_stats.items():
+                self.dictionary['deadline_' + k] = v
@@ -0,0 +1,188 @@
+import gc
+import hashlib
+import os
+import pickle
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Collection, Hashable, Union
+
+from common.tokens.abstract_tokens import InventedToken, Token
+from common.tokens.control_tokens import If, LoopWhile
+from search.invent import invent2
+
+
+class TokenLibraries:
+    """Process-wide store of invented token libraries. A library is identified by the name of the invention method, its
+    parameters and the base tokens of the domain, and is built only the first time it is requested. Test cases of the
+    same domain, and every search algorithm inventing tokens the same way, then share one library.
+
+    If a 'directory' is set, libraries are also persisted there, such that other processes and later runs load them
+    instead of building them. They are stored in a compact form, in which every base token is replaced by an index into
+    the sorted names of the base tokens, and tokens that occur in several tokens are stored once.
+
+    The libraries are shared, so the tokens in them must not be altered. The lists returned are copies."""
+
+    def __init__(self, directory: Union[str, None] = None):
+        self.directory = directory
+        self._libraries = {}
+
+        self.hits = 0
+        self.loads = 0
+        self.builds = 0
+
+    def get(self, name: str, trans_tokens: Collection[Token], bool_tokens: Collection[Token], params: tuple,
+            build: Callable[[], list[Token]]) -> list[Token]:
+        """Returns the library 'name' with 'params' for the given base tokens, calling 'build' if it is not available in
+        this process nor in 'directory'."""
+        key = (name, _names(trans_tokens), _names(bool_tokens), params)
+        bases = _bases(trans_tokens, bool_tokens)
+
+        library = self._libraries.get(key)
+        if library is not None:
+            self.hits += 1
+            return list(library)
+
+        library = self._load(key, bases)
+        if library is not None:
+            self.loads += 1
+        else:
+            self.builds += 1
+            library = list(build())
+            self._store(key, bases, library)
+
+        self._libraries[key] = library
+        return list(library)
+
+    @contextmanager
+    def using_directory(self, directory: Union[str, None]):
+        """Context in which libraries are also persisted in 'directory', after which the previous directory is restored.
+        Nothing changes if 'directory' is None."""
+        previous = self.directory
+        if directory is not None:
+            self.directory = directory
+        try:
+            yield self
+        finally:
+            self.directory = previous
+
+    def clear(self):
+        """Forgets the libraries built or loaded in this process. Persisted libraries are kept."""
+        self._libraries = {}
+
+    def __len__(self) -> int:
+        return len(self._libraries)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "loads": self.loads, "builds": self.builds, "size": len(self)}
+
+    def _path(self, key: Hashable) -> str:
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode()).hexdigest() + ".tokens")
+
+    def _load(self, key: Hashable, bases: dict[str, Token]) -> Union[list[Token], None]:
+        if self.directory is None or not os.path.exists(self._path(key)):
+            return None
+
+        # Loading creates many objects, none of which are garbage. Collecting while doing so only costs time.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self._path(key), "rb") as file:
+                stored_key, encoded = pickle.load(file)
+
+            if stored_key != key:
+                return None
+
+            return _decode(*encoded, list(bases.values()))
+        finally:
+            if collecting:
+                gc.enable()
+
+    def _store(self, key: Hashable, bases: dict[str, Token], library: list[Token]):
+        if self.directory is None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        indices = {name: i for i, name in enumerate(bases)}
+        encoded = _encode(library, indices)
+
+        # Write to a temporary file first, such that processes loading the library concurrently never see a partial one.
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump((key, encoded), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+
+# Libraries shared by all search algorithms in this process.
+token_libraries = TokenLibraries()
+
+
+def invent2_library(trans_tokens: Collection[Token], bool_tokens: Collection[Token], max_length: int) -> list[Token]:
+    """Returns invent2(trans_tokens, bool_tokens, max_length) from the shared token libraries."""
+    return token_libraries.get("invent2", trans_tokens, bool_tokens, (max_length,),
+                               lambda: invent2(trans_tokens, bool_tokens, max_length))
+
+
+def _name(token: Token) -> str:
+    return "%s.%s" % (type(token).__module__, type(token).__qualname__)
+
+
+def _names(tokens: Collection[Token]) -> tuple[str]:
+    """Returns the names of the given tokens in the order in which invention uses them: sets are ordered by name."""
+    if not isinstance(tokens, (list, tuple)):
+        tokens = sorted(tokens, key=str)
+    return tuple(map(_name, tokens))
+
+
+def _bases(trans_tokens: Collection[Token], bool_tokens: Collection[Token]) -> dict[str, Token]:
+    """Returns one base token per name, sorted by name. Transition and boolean tokens are kept apart."""
+    bases = {}
+    for prefix, tokens in (("trans:", trans_tokens), ("bool:", bool_tokens)):
+        for token in sorted(tokens, key=_name):
+            bases.setdefault(prefix + _name(token), token)
+    return bases
+
+
+def _encode(library: list[Token], indices: dict[str, int]) -> tuple[list[tuple], list[int]]:
+    """Returns the distinct tokens of 'library' as nodes that refer to the nodes of their sub-tokens by position, and
+    the positions of the nodes of the library itself. A token that occurs in several tokens is stored once."""
+    nodes = []
+    positions = {}  # for each encoded token: the position of its node
+
+    def encode(token: Token) -> int:
+        position = positions.get(id(token))
+        if position is not None:
+            return position
+
+        if isinstance(token, InventedToken):
+            node = "I", tuple(map(encode, token.tokens))
+        elif isinstance(token, If):
+            node = "F", encode(token.cond), tuple(map(encode, token.e1)), tuple(map(encode, token.e2))
+        elif isinstance(token, LoopWhile):
+            node = "W", encode(token.cond), tuple(map(encode, token.loop_body))
+        else:
+            index = indices.get("trans:" + _name(token), indices.get("bool:" + _name(token)))
+            if index is None:
+                raise TypeError("Cannot encode token %s" % token)
+            node = "B", index
+
+        positions[id(token)] = position = len(nodes)
+        nodes.append(node)
+        return position
+
+    return nodes, [encode(t) for t in library]
+
+
+def _decode(nodes: list[tuple], roots: list[int], base_tokens: list[Token]) -> list[Token]:
+    tokens = []
+    for node in nodes:
+        kind = node[0]
+        if kind == "B":
+            token = base_tokens[node[1]]
+        elif kind == "I":
+            token = InventedToken([tokens[i] for i in node[1]])
+        elif kind == "F":
+            token = If(tokens[node[1]], [tokens[i] for i in node[2]], [tokens[i] for i in node[3]])
+        else:
+            token = LoopWhile(tokens[node[1]], [tokens[i] for i in node[2]])
+        tokens.append(token)
+    return [tokens[i] for i in roots]
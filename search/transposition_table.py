@@ -0,0 +1,42 @@
+from common.environment import Environment
+from common.lru_cache import LRUCache
+
+# Default maximum number of distinct tuples of environments remembered by a TranspositionTable.
+TRANSPOSITION_TABLE_SIZE = 100000
+
+
+class TranspositionTable:
+    """Remembers which tuples of resulting environments (one per example) have been reached during a search. Programs
+    that yield a tuple that was reached before are observationally equivalent to a program that was already explored,
+    so a search can skip scoring and expanding them.
+
+    The tuples themselves are stored, such that two tuples are only considered the same if their environments are
+    equal, and not merely if their hashes collide. The environments must therefore not be altered after they have been
+    recorded. The number of remembered tuples is bounded: the least recently reached ones are forgotten first."""
+
+    def __init__(self, capacity: int = TRANSPOSITION_TABLE_SIZE):
+        self._entries = LRUCache(capacity)
+
+    def visit(self, envs: tuple[Environment]) -> bool:
+        """Records that 'envs' was reached. Returns whether it was reached before."""
+        key = tuple(envs)
+
+        if self._entries.get(key) is not None:
+            return True
+
+        self._entries.put(key, True)
+        return False
+
+    def __contains__(self, envs: tuple[Environment]) -> bool:
+        return tuple(envs) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Returns the counters of this table, where hits are programs that were found to be equivalent to an earlier
+        one."""
+        stats = self._entries.stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -1,9 +1,10 @@
-import copy
 import random
+from typing import Iterator
 
 from common.tokens.abstract_tokens import TransToken, BoolToken, EnvToken, ControlToken
 from common.tokens.control_tokens import If, LoopWhile
 from common.tokens.string_tokens import MoveRight, AtEnd, NotAtEnd
+from search.token_library import token_libraries
 
 
 class VariableDepthInvent:
@@ -15,16 +16,22 @@ class VariableDepthInvent:
 
         self._depth = 2
 
-        self._ifs = self._all_ifs(1, 1)
-        self._loops = self._all_loops(1, 1)
+        self._ifs = self._library("ifs", 1, 1)
+        self._loops = self._library("loops", 1, 1)
 
     def increment_depth(self):
         if self._depth == self._max_depth:
             return
 
         self._depth += 1
-        self._ifs.extend(self._all_ifs(self._depth, self._max_control_tokens))
-        self._loops.extend(self._all_loops(self._depth, self._max_control_tokens))
+        self._ifs.extend(self._library("ifs", self._depth, self._max_control_tokens))
+        self._loops.extend(self._library("loops", self._depth, self._max_control_tokens))
+
+    def _library(self, kind: str, n: int, control_tokens: int) -> list[ControlToken]:
+        """Returns _all_ifs or _all_loops for the given arguments from the shared token libraries."""
+        build = self._all_ifs if kind == "ifs" else self._all_loops
+        return token_libraries.get("VariableDepthInvent." + kind, self._trans_tokens, self._bool_tokens,
+                                   (n, control_tokens, self._max_control_tokens), lambda: build(n, control_tokens))
 
     def random_token(self, w_trans: float, w_if: float, w_loop: float) -> EnvToken:
         return random.choices([
@@ -55,12 +62,13 @@ class VariableDepthInvent:
             r = range(1, n-1) if full else range(0, n)
 
             for l_e1 in r:
-                for e1 in self._seqs(l_e1, control_tokens - 1):
-                    for e2 in self._seqs(n - l_e1, control_tokens - 1):
+                else_branches = self._seqs(n - l_e1, control_tokens - 1)
+                for e1 in self._iter_seqs(l_e1, control_tokens - 1):
+                    for e2 in else_branches:
                         if e1 == e2:
                             continue
 
-                        res.append(If(cond, e1, e2))
+                        res.append(If(cond, e1, list(e2)))
 
         return res
 
@@ -71,7 +79,7 @@ class VariableDepthInvent:
         res = []
 
         for cond in self._bool_tokens:
-            for lb in self._seqs(n, control_tokens - 1, require_full_ifs=True, allow_loop_head=False):
+            for lb in self._iter_seqs(n, control_tokens - 1, require_full_ifs=True, allow_loop_head=False):
                 if len(lb) == 0:
                     continue
 
@@ -80,32 +88,39 @@ class VariableDepthInvent:
         return res
 
     def _seqs(self, n: int, control_tokens: int, require_full_ifs=False, allow_loop_head=True) -> list[list[EnvToken]]:
+        return list(self._iter_seqs(n, control_tokens, require_full_ifs, allow_loop_head))
+
+    def _iter_seqs(self, n: int, control_tokens: int, require_full_ifs=False, allow_loop_head=True) -> Iterator[list[EnvToken]]:
+        """Generates the sequences of _seqs lazily, in the same order. Every generated sequence is a new list."""
         if n == 0:
-            return [[]]
+            yield []
+            return
 
-        res = []
         # Head normal token
         tails = self._seqs(n - 1, control_tokens, require_full_ifs)
-        res.extend([copy.copy(tail) + [t] for t in self._trans_tokens for tail in tails])
+        for t in self._trans_tokens:
+            for tail in tails:
+                yield tail + [t]
 
         if control_tokens == self._max_control_tokens:
-            return res
+            return
 
         # Head if
         for l_tail in range(0, n):
             tails = self._seqs(l_tail, control_tokens, require_full_ifs)
-            res.extend([copy.copy(tail) + [t] for t in self._all_ifs(n - l_tail, control_tokens, full=require_full_ifs) for tail in tails])
+            for t in self._all_ifs(n - l_tail, control_tokens, full=require_full_ifs):
+                for tail in tails:
+                    yield tail + [t]
 
         if not allow_loop_head:
-            return res
+            return
 
         # Head loop
         for l_tail in range(0, n):
             tails = self._seqs(l_tail, control_tokens, require_full_ifs)
-            res.extend(
-                [copy.copy(tail) + [t] for t in self._all_loops(n - l_tail, control_tokens) for tail in tails])
-
-        return res
+            for t in self._all_loops(n - l_tail, control_tokens):
+                for tail in tails:
+                    yield tail + [t]
 
 if __name__ == "__main__":
     vdi = VariableDepthInvent([MoveRight()]*5,[AtEnd()]*14, 5, 2)
@@ -2,8 +2,11 @@ import time
 
 from common.experiment import Example
 from common.prorgam import Program
+from common.simplifier import simplify
 from common.tokens.abstract_tokens import EnvToken, BoolToken, TransToken
 from search.abstract_search import SearchAlgorithm
+from search.convergence_trace import ConvergenceTrace
+from search.evaluator import Evaluator
 from search.search_result import SearchResult
 from search.vlns.large_neighborhood_search.accept.accept import Accept
 from search.vlns.large_neighborhood_search.destroy.destroy import Destroy
@@ -25,6 +28,9 @@ class LNS(SearchAlgorithm):
         self.increase_depth_after = increase_depth_after
         self.debug = debug
 
+        # Whether repaired solutions are simplified into equivalent shorter programs before their cost is calculated
+        self.simplify_repaired = False
+
         self.sol_current = None
         self.cost_best = -1
         self.cost_current = -1
@@ -39,7 +45,8 @@ class LNS(SearchAlgorithm):
 
         self._best_program = Program([])
         self.sol_current = Program([])
-        self.cost_best = self.cost(exs=test_case, p=self._best_program)
+        self.evaluator = Evaluator(test_case, mean=True)
+        self.cost_best = self.evaluator.evaluate(self._best_program)[0]
         self.cost_current = self.cost_best
 
         self.cost_dict = {}
@@ -51,8 +58,8 @@ class LNS(SearchAlgorithm):
         self.stats["time_destroy"] = 0
         self.stats["time_repair"] = 0
         self.stats["time_cost"] = 0
-        self.stats["best_cost_per_iteration"] = []
-        self.stats["current_cost_per_iteration"] = []
+        self.stats["best_cost_trace"] = ConvergenceTrace(improvements_only=True)
+        self.stats["current_cost_trace"] = ConvergenceTrace()
         self.stats["explored_per_depth"] = {k: 0 for k in range(1, self.stats["search_depth"]+1)}
         self.stats["multiple_explored_per_depth"] = {k: 0 for k in range(1, self.stats["search_depth"]+1)}
 
@@ -69,6 +76,8 @@ class LNS(SearchAlgorithm):
 
         # Repair destroyed solution into temporary solution
         x_temp = self.repair.repair(destroyed)
+        if self.simplify_repaired:
+            x_temp = simplify(x_temp)
         t_r = time.process_time()
 
         # Calculate cost of temporary solution
@@ -84,8 +93,7 @@ class LNS(SearchAlgorithm):
 
             self.iterations_since_last_best = 0
 
-            pair = (self.stats["iterations"], self.cost_best.__round__(2))
-            self.stats["best_cost_per_iteration"].append(pair)
+            self.stats["best_cost_trace"].record(self.stats["iterations"], self.cost_best.__round__(2))
         else:
             self.iterations_since_last_best += 1
 
@@ -111,8 +119,7 @@ class LNS(SearchAlgorithm):
             self.sol_current = x_temp
             self.cost_current = c_temp
 
-            #pair = (self.stats["iterations"], self.cost_current.__round__(2))
-            #self.stats["current_cost_per_iteration"].append(pair)
+            self.stats["current_cost_trace"].record(self.stats["iterations"], self.cost_current.__round__(2))
 
         # Update stats
         self.stats["average_visited_length"] += x_temp.number_of_tokens()
@@ -125,15 +132,20 @@ class LNS(SearchAlgorithm):
         return c_temp != 0
 
     def extend_result(self, res: SearchResult) -> SearchResult:
+        # The result gets a copy of the stats, such that they are left intact for another call
+        stats = dict(self.stats)
+
         # Round times for readability
-        self.stats["average_visited_length"] /= self.stats["iterations"]
-        self.stats["number_of_explored_programs"] = len(self.cost_dict)
-        self.stats["time_destroy"] = self.stats["time_destroy"].__round__(3)
-        self.stats["time_repair"] = self.stats["time_repair"].__round__(3)
-        self.stats["time_cost"] = self.stats["time_cost"].__round__(3)
+        stats["average_visited_length"] /= stats["iterations"]
+        stats["number_of_explored_programs"] = len(self.cost_dict)
+        stats["time_destroy"] = stats["time_destroy"].__round__(3)
+        stats["time_repair"] = stats["time_repair"].__round__(3)
+        stats["time_cost"] = stats["time_cost"].__round__(3)
+        stats["best_cost_trace"] = list(stats["best_cost_trace"])
+        stats["current_cost_trace"] = list(stats["current_cost_trace"])
 
-        self.stats.update(res.dictionary)
-        res.dictionary = self.stats
+        stats.update(res.dictionary)
+        res.dictionary = stats
 
         return res
 
@@ -144,10 +156,10 @@ class LNS(SearchAlgorithm):
     cost_dict = {}
 
     def eff_cost(self, test_case: list[Example], program: Program):
-        key = str(program)
+        key = program.key()
 
         if key not in self.cost_dict:
-            self.cost_dict[key] = self.cost(test_case, program)
+            self.cost_dict[key] = self.evaluator.evaluate(program)[0]
             self.stats["explored_per_depth"][self.stats["search_depth"]] += 1
         else:
             self.stats["multiple_explored_per_depth"][self.stats["search_depth"]] += 1
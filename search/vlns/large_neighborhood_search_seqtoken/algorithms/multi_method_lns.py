@@ -70,5 +70,5 @@ if __name__ == "__main__0":
     print("Final program: {}".format(p))
     print("Cost: {}".format(c))
     print("Execution time: {}".format(r.dictionary["execution_time"]))
-    #print(r.dictionary['best_cost_per_iteration'])
-    #print(r.dictionary['current_cost_per_iteration'])
\ No newline at end of file
+    #print(r.dictionary['best_cost_trace'])
+    #print(r.dictionary['current_cost_trace'])
\ No newline at end of file
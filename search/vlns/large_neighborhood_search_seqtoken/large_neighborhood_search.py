@@ -1,13 +1,15 @@
 import copy
 import time
-from statistics import mean
 
+from common.environment import Environment
 from common.experiment import TestCase, Example
 from common.prorgam import Program
 from common.tokens.abstract_tokens import Token, EnvToken, BoolToken, InvalidTransition
 from common.tokens.control_tokens import LoopIterationLimitReached, StringEnvironment
 
 from search.abstract_search import SearchAlgorithm
+from search.convergence_trace import ConvergenceTrace
+from search.evaluator import Evaluator
 from search.search_result import SearchResult
 from search.vlns.large_neighborhood_search_seqtoken.accept.accept import Accept
 from search.vlns.large_neighborhood_search_seqtoken.destroy.destroy import Destroy
@@ -29,8 +31,8 @@ class LNS(SearchAlgorithm):
         self.c_current = float('inf')
         self.iteration_number = 1
 
-        self.best_cost_per_iteration = []
-        self.current_cost_per_iteration = []
+        self.best_cost_trace = ConvergenceTrace(improvements_only=True)
+        self.current_cost_trace = ConvergenceTrace()
 
         self.time_destroy = 0
         self.time_repair = 0
@@ -40,17 +42,19 @@ class LNS(SearchAlgorithm):
         self.seq_cost = lambda s: -1
 
     def setup(self, test_case: list[Example], trans_tokens: set[EnvToken], bool_tokens: set[BoolToken]):
-        self.repair.set_seq_cost(lambda s: self.cost_seq(test_case, s))
+        self.evaluator = Evaluator(test_case, mean=True)
+        self.seq_evaluator = Evaluator(test_case, mean=True, run=run_seq)
+        self.repair.set_seq_cost(self.cost_seq)
         self.repair.set_token_libraries(trans_tokens, bool_tokens)
-        self.destroy.cost = lambda s: self.cost_seq(test_case, s)
+        self.destroy.cost = self.cost_seq
 
-        self.c_best = self.cost(test_case, self.best_program)
+        self.c_best = self.evaluator.evaluate(self.best_program)[0]
         self.x_current = Program([])
         self.c_current = self.c_best
         self.iteration_number = 1
 
-        self.best_cost_per_iteration = []
-        self.current_cost_per_iteration = []
+        self.best_cost_trace = ConvergenceTrace(improvements_only=True)
+        self.current_cost_trace = ConvergenceTrace()
 
         self.time_destroy = 0
         self.time_repair = 0
@@ -75,14 +79,14 @@ class LNS(SearchAlgorithm):
         t_r = time.process_time()
         self.time_repair += (t_r - t_d)
 
-        c_temp = self.cost(test_case, x_temp)
+        c_temp = self.evaluator.evaluate(x_temp)[0]
         t_c = time.process_time()
         self.time_cost += (t_c - t_r)
         if self.debug:
             print("Repaired ({}): {}".format(c_temp, x_temp))
 
-        self.best_cost_per_iteration.append(self.c_best.__round__(1))
-        self.current_cost_per_iteration.append(self.c_current.__round__(1))
+        self.best_cost_trace.record(self.iteration_number, self.c_best.__round__(1))
+        self.current_cost_trace.record(self.iteration_number, self.c_current.__round__(1))
 
         # New best solution found
         if c_temp < self.c_best:
@@ -100,8 +104,8 @@ class LNS(SearchAlgorithm):
         return c_temp != 0
 
     def extend_result(self, res: SearchResult) -> SearchResult:
-        res.dictionary["best_cost_per_iteration"] = self.best_cost_per_iteration
-        res.dictionary["current_cost_per_iteration"] = self.current_cost_per_iteration
+        res.dictionary["best_cost_trace"] = list(self.best_cost_trace)
+        res.dictionary["current_cost_trace"] = list(self.current_cost_trace)
         res.dictionary["time_destroy"] = self.time_destroy
         res.dictionary["time_repair"] = self.time_repair
         res.dictionary["time_cost"] = self.time_cost
@@ -110,13 +114,11 @@ class LNS(SearchAlgorithm):
 
         return res
 
-    @staticmethod
-    def cost_seq(tc: list[Example], seq: SeqToken):
-        def ex_cost(ex: Example):
-            try:
-                inp = copy.deepcopy(ex.input_environment)
-                return seq.apply(inp).distance(ex.output_environment)
-            except (InvalidTransition, LoopIterationLimitReached):
-                return float('inf')
+    def cost_seq(self, seq: SeqToken):
+        """Returns the mean cost of 'seq' on the examples of the current search, evaluated by 'seq_evaluator'."""
+        return self.seq_evaluator.evaluate(seq)[0]
 
-        return mean([ex_cost(ex) for ex in tc])
\ No newline at end of file
+
+def run_seq(seq: SeqToken, env: Environment) -> Environment:
+    """Runs a SeqToken on an Environment, which is altered."""
+    return seq.apply(env)
\ No newline at end of file
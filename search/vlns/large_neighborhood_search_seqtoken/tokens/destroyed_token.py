@@ -13,6 +13,9 @@ class DestroyedToken(Token):
 
         return self.destroyed_token.apply(env)
 
+    def shape(self):
+        return type(self), None if self.destroyed_token is None else self.destroyed_token.token_id()
+
     def __str__(self):
         return "Destroyed({})".format(self.destroyed_token)
 
@@ -59,6 +59,9 @@ class SequenceToken(SeqToken):
     def apply(self, env: Environment) -> Environment:
         return self.tail.apply(self.head.apply(env))
 
+    def shape(self):
+        return SequenceToken, self.head.token_id(), self.tail.token_id()
+
     def __str__(self):
         return "{}, {}".format(self.head, self.tail)
 
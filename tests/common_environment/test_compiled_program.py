@@ -0,0 +1,98 @@
+import unittest
+
+from common.compiled_program import CompiledProgram
+from common.environment import RobotEnvironment
+from common.prorgam import Program
+from common.tokens.abstract_tokens import InventedToken, InvalidTransition
+from common.tokens.control_tokens import *
+from common.tokens.string_tokens import *
+import common.tokens.robot_tokens as robot_tokens
+
+
+class TestCompiledProgram(unittest.TestCase):
+    def assertSameResult(self, p: Program, env):
+        expected = p.interp(env)
+        result = CompiledProgram(p).interp(env)
+
+        self.assertEqual(result, expected)
+        self.assertEqual(str(result), str(expected))
+
+    def test_sequence(self):
+        p = Program([MakeUppercase(), MoveRight(), InventedToken([MakeUppercase(), MoveRight()]), Drop()])
+
+        self.assertSameResult(p, StringEnvironment(list("hello, world!")))
+
+    def test_if(self):
+        p = Program([
+            If(IsUppercase(), [MakeLowercase()], [MakeUppercase()]),
+            MoveRight(),
+            If(IsUppercase(), [MakeLowercase()], []),
+        ])
+
+        self.assertSameResult(p, StringEnvironment(list("Hello, World!")))
+        self.assertSameResult(p, StringEnvironment(list("hEllo, World!")))
+
+    def test_nested(self):
+        p = Program([
+            LoopWhile(NotAtEnd(), [
+                If(IsUppercase(),
+                   [MakeLowercase()],
+                   [If(IsLowercase(), [MakeUppercase()], [Drop()])]),
+                LoopWhile(IsSpace(), [MoveRight()]),
+                MoveRight()
+            ]),
+            MakeUppercase()
+        ])
+
+        self.assertSameResult(p, StringEnvironment(list("hello, World!")))
+        self.assertSameResult(p, StringEnvironment(list("#ello,   World!")))
+
+    def test_robot(self):
+        p = Program([
+            LoopWhile(robot_tokens.NotAtRight(), [robot_tokens.MoveRight()]),
+            robot_tokens.MoveUp(),
+        ])
+
+        self.assertSameResult(p, RobotEnvironment(5, 0, 2, 3, 3))
+
+    def test_fused(self):
+        p = Program([
+            MoveRight(),
+            InventedToken([MakeUppercase(), MoveRight()]),
+            If(IsUppercase(), [InventedToken([MakeLowercase(), MoveRight()])], [MakeUppercase()]),
+            LoopWhile(NotAtEnd(), [InventedToken([MakeUppercase(), MoveRight()])]),
+        ])
+
+        self.assertEqual(len(CompiledProgram(p)), 3)
+        self.assertSameResult(p, StringEnvironment(list("hello, world!")))
+
+    def test_input_unchanged(self):
+        env = StringEnvironment(list("hello"))
+        CompiledProgram(Program([MakeUppercase(), Drop()])).interp(env)
+
+        self.assertEqual(env.to_string(), "hello")
+
+    def test_limit(self):
+        p = Program([LoopWhile(NotAtEnd(), [])])
+
+        self.assertRaises(LoopIterationLimitReached, lambda: CompiledProgram(p).interp(StringEnvironment(list("abc"))))
+
+    def test_step_limit(self):
+        env = StringEnvironment(list("hello, world!"))
+        tokens = [
+            LoopWhile(NotAtEnd(), [MoveRight()]),
+            LoopWhile(NotAtStart(), [If(IsLetter(), [MoveLeft()], [MakeUppercase(), MoveLeft()])]),
+        ]
+
+        self.assertEqual(CompiledProgram(Program(tokens, step_limit=24)).interp(env).steps, 24)
+        self.assertRaises(StepLimitReached, lambda: CompiledProgram(Program(tokens, step_limit=23)).interp(env))
+        self.assertRaises(StepLimitReached, lambda: CompiledProgram(Program(tokens, step_limit=11)).interp(env))
+
+    def test_invalid_transition(self):
+        p = Program([MoveLeft()])
+
+        self.assertRaises(InvalidTransition, lambda: CompiledProgram(p).interp(StringEnvironment(list("abc"))))
+
+
+if __name__ == '__main__':
+    unittest.main()
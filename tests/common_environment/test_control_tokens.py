@@ -1,3 +1,4 @@
+import copy
 import unittest
 
 from common.tokens.control_tokens import *
@@ -59,5 +60,29 @@ class TestLoop(unittest.TestCase):
 
         self.assertRaises(LoopIterationLimitReached, lambda : p.interp(e1))
 
+    def test_step_limit(self):
+        e1 = StringEnvironment(list("hello, world!"))
+        tokens = [
+            LoopWhile(NotAtEnd(), [MoveRight()]),
+            LoopWhile(NotAtStart(), [MoveLeft()])
+        ]
+
+        # Every loop stays within its own limit, but together they iterate 24 times.
+        self.assertEqual(Program(tokens, step_limit=24).interp(e1).steps, 24)
+        self.assertRaises(StepLimitReached, lambda : Program(tokens, step_limit=23).interp(e1))
+
+    def test_step_limit_copies(self):
+        tokens = [
+            LoopWhile(NotAtEnd(), [MoveRight()]),
+            LoopWhile(NotAtStart(), [MoveLeft()])
+        ]
+        env = Program([], step_limit=23).interp(StringEnvironment(list("hello, world!")))
+
+        # Searches apply the tokens one at a time, each on a copy of the previous environment. Copies keep the steps
+        # executed so far, so only the program as a whole exceeds the step limit, as with Program.interp.
+        env = tokens[0].apply(copy.deepcopy(env))
+        self.assertEqual(copy.deepcopy(env).steps, 12)
+        self.assertRaises(StepLimitReached, lambda : tokens[1].apply(copy.deepcopy(env)))
+
 if __name__ == '__main__':
     unittest.main()
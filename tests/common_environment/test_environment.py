@@ -1,6 +1,11 @@
 from unittest import TestCase
 
-from common.environment import StringEnvironment
+from common.environment import StringEnvironment, RobotEnvironment, PixelEnvironment
+from common.prorgam import Program
+from common.tokens.abstract_tokens import InvalidTransition
+import common.tokens.pixel_tokens as pixel_tokens
+import common.tokens.robot_tokens as robot_tokens
+import common.tokens.string_tokens as string_tokens
 
 
 class TestRobotEnvironment(TestCase):
@@ -34,10 +39,113 @@ class TestStringEnvironment(TestCase):
         a2 = "H1elo, worllD"
         self.assertEqual(self._dist(a1, a2), 5)
 
+    def test_edit_distance(self):
+        pairs = [("", ""), ("", "abc"), ("kitten", "sitting"), ("Hello world", "H1elo, worllD"),
+                 ("a" * 80, "b" * 70 + "a"), ("abcdef" * 20, "badcfe" * 19)]
+        for a, b in pairs:
+            self.assertEqual(StringEnvironment.edit_distance(a, b), StringEnvironment._levenshtein(a, b))
+            self.assertEqual(StringEnvironment.edit_distance(b, a), StringEnvironment._levenshtein(a, b))
+
+    def test_edit_distance_upper_bound(self):
+        self.assertEqual(StringEnvironment.edit_distance("kitten", "sitting", 3), 3)
+        self.assertGreater(StringEnvironment.edit_distance("kitten", "sitting", 2), 2)
+        self.assertGreater(StringEnvironment.edit_distance("a" * 80, "b" * 80, 10), 10)
+        self.assertGreater(StringEnvironment.edit_distance("", "abc", 1), 1)
+
     def test_correct(self):
         a1 = "Hello world"
         a2 = "Hello world"
         e1 = StringEnvironment(a1, pos=0)
         e2 = StringEnvironment(a2, pos=3)
 
-        self.assertTrue(e1.correct(e2))
\ No newline at end of file
+        self.assertTrue(e1.correct(e2))
+
+
+class TestCheckpoint(TestCase):
+    def test_string(self):
+        env = StringEnvironment(list("Hello, world"), pos=2)
+        marker = env.checkpoint()
+
+        Program([string_tokens.MakeUppercase(), string_tokens.Drop(), string_tokens.MoveRight(),
+                 string_tokens.Drop()]).interp_in_place(env)
+        self.assertEqual(env.to_string(), "Hel, world")
+
+        env.rollback(marker)
+        self.assertEqual(env.to_string(), "Hello, world")
+        self.assertEqual(env.pos, 2)
+        self.assertIsNone(env.undo_log)
+
+    def test_string_nested(self):
+        env = StringEnvironment(list("abc"))
+        outer = env.checkpoint()
+        string_tokens.MakeUppercase().apply(env)
+        inner = env.checkpoint()
+        string_tokens.Drop().apply(env)
+        self.assertEqual(env.to_string(), "bc")
+
+        env.rollback(inner)
+        self.assertEqual(env.to_string(), "Abc")
+
+        env.rollback(outer)
+        self.assertEqual(env.to_string(), "abc")
+
+    def test_string_exception(self):
+        env = StringEnvironment(list("abc"))
+        marker = env.checkpoint()
+
+        p = Program([string_tokens.Drop(), string_tokens.Drop(), string_tokens.MoveRight()])
+        self.assertRaises(InvalidTransition, lambda: p.interp_in_place(env))
+
+        env.rollback(marker)
+        self.assertEqual(env, StringEnvironment(list("abc")))
+
+    def test_robot(self):
+        env = RobotEnvironment(5, 0, 0, 1, 0)
+        marker = env.checkpoint()
+
+        Program([robot_tokens.MoveRight(), robot_tokens.Grab(), robot_tokens.MoveDown()]).interp_in_place(env)
+        self.assertEqual(env, RobotEnvironment(5, 1, 1, 1, 1, True))
+
+        env.rollback(marker)
+        self.assertEqual(env, RobotEnvironment(5, 0, 0, 1, 0))
+
+    def test_pixel(self):
+        env = PixelEnvironment(2, 2, 0, 0)
+        marker = env.checkpoint()
+
+        Program([pixel_tokens.Draw(), pixel_tokens.MoveDown(), pixel_tokens.Draw()]).interp_in_place(env)
+        self.assertEqual(env.pixels, (True, False, True, False))
+
+        env.rollback(marker)
+        self.assertEqual(env, PixelEnvironment(2, 2, 0, 0))
+
+
+class TestIncrementalDistance(TestCase):
+    def _check(self, parent, tokens, goal):
+        child = Program(tokens).interp(parent)
+        d = child.incremental_distance(goal, parent, parent.distance(goal))
+        self.assertEqual(d, child.distance(goal))
+
+    def test_string(self):
+        goal = StringEnvironment(list("Hello world"))
+        self._check(StringEnvironment(list("hello world")), [string_tokens.MoveRight()], goal)
+        self._check(StringEnvironment(list("hello world")), [string_tokens.MakeUppercase()], goal)
+        self._check(StringEnvironment(list("Hello world")), [string_tokens.MakeUppercase()], goal)
+        self._check(StringEnvironment(list("Hello world")), [string_tokens.Drop()], goal)
+        self._check(StringEnvironment(list("Hello world")), [string_tokens.MoveRight(), string_tokens.MakeUppercase(),
+                                                             string_tokens.MoveRight(), string_tokens.MakeUppercase()],
+                    goal)
+
+    def test_robot(self):
+        goal = RobotEnvironment(5, 3, 3, 2, 2)
+        self._check(RobotEnvironment(5, 0, 0, 1, 0), [robot_tokens.MoveRight()], goal)
+        self._check(RobotEnvironment(5, 1, 0, 1, 0), [robot_tokens.Grab(), robot_tokens.MoveDown()], goal)
+
+    def test_pixel(self):
+        goal = PixelEnvironment(2, 2, 0, 0, (True, False, False, True))
+        self._check(PixelEnvironment(2, 2, 0, 0), [pixel_tokens.MoveRight()], goal)
+        self._check(PixelEnvironment(2, 2, 0, 0), [pixel_tokens.Draw()], goal)
+        self._check(PixelEnvironment(2, 2, 1, 0), [pixel_tokens.Draw()], goal)
+        self._check(PixelEnvironment(2, 2, 0, 0, (True, False, False, False)), [pixel_tokens.Erase()], goal)
+        self._check(PixelEnvironment(2, 2, 0, 0), [pixel_tokens.Draw(), pixel_tokens.MoveDown(),
+                                                   pixel_tokens.MoveRight(), pixel_tokens.Draw()], goal)
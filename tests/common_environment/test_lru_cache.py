@@ -0,0 +1,30 @@
+import unittest
+
+from common.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_put(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 1, 0))
+
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats(), {"capacity": 2, "size": 2, "hits": 1, "misses": 0, "evictions": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
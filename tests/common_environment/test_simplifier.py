@@ -0,0 +1,66 @@
+import unittest
+
+from common.environment import StringEnvironment
+from common.prorgam import Program
+from common.simplifier import Simplifier, is_redundant, simplify
+from common.tokens.abstract_tokens import InventedToken
+from common.tokens.control_tokens import If, LoopWhile
+from common.tokens.string_tokens import *
+import common.tokens.pixel_tokens as pixel_tokens
+
+
+class TestSimplifier(unittest.TestCase):
+    def test_inline(self):
+        p = Program([InventedToken([MoveRight(), InventedToken([Drop()])]), MoveLeft()])
+
+        self.assertEqual(simplify(p), Program([MoveRight(), Drop(), MoveLeft()]))
+        self.assertFalse(is_redundant(p))
+
+    def test_overrides(self):
+        p = Program([MakeUppercase(), MakeUppercase(), MakeUppercase(), MoveRight()])
+        self.assertEqual(simplify(p), Program([MakeUppercase(), MoveRight()]))
+
+        p = Program([pixel_tokens.Draw(), pixel_tokens.Erase(), pixel_tokens.Draw()])
+        self.assertEqual(simplify(p), Program([pixel_tokens.Draw()]))
+
+    def test_inverses(self):
+        p = Program([MoveLeft(), MoveRight(), MoveRight(), MoveLeft(), Drop()])
+
+        self.assertEqual(simplify(p), p)
+        self.assertEqual(simplify(p, exact=False), Program([Drop()]))
+        self.assertTrue(is_redundant(p))
+
+    def test_known_condition(self):
+        loop = LoopWhile(NotAtEnd(), [MoveRight()])
+        p = Program([loop, LoopWhile(NotAtEnd(), [Drop()]), If(AtEnd(), [Drop()], [MoveLeft()]), loop])
+
+        self.assertEqual(simplify(p), Program([loop, Drop(), loop]))
+
+    def test_equal_branches(self):
+        simplifier = Simplifier()
+        p = Program([If(IsUppercase(), [MoveRight()], [MoveRight()])])
+
+        # String conditions raise on empty strings, so the If can only be removed if that is ignored.
+        self.assertEqual(simplifier.simplify(p), p)
+        self.assertEqual(simplifier.rewrites, 0)
+        self.assertEqual(simplify(p, exact=False), Program([MoveRight()]))
+
+        p = Program([If(pixel_tokens.AtTop(), [pixel_tokens.Draw()], [pixel_tokens.Draw()])])
+        self.assertEqual(simplify(p), Program([pixel_tokens.Draw()]))
+
+    def test_nested(self):
+        p = Program([LoopWhile(IsLetter(), [InventedToken([MakeLowercase(), MakeLowercase()]), MoveRight()])])
+
+        self.assertEqual(simplify(p), Program([LoopWhile(IsLetter(), [MakeLowercase(), MoveRight()])]))
+
+    def test_same_result(self):
+        p = Program([MakeLowercase(), MakeUppercase(), LoopWhile(IsLetter(), [MoveRight()]),
+                     LoopWhile(IsLetter(), [Drop()]), If(IsNotLetter(), [MakeLowercase()], [Drop()])])
+        env = StringEnvironment(list("abc def"))
+
+        self.assertEqual(simplify(p).interp(env), p.interp(env))
+        self.assertLess(simplify(p).number_of_tokens(), p.number_of_tokens())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import copy
+import unittest
+
+from common.prorgam import Program
+from common.tokens import abstract_tokens
+from common.tokens.abstract_tokens import InventedToken, clear_token_ids
+from common.tokens.control_tokens import If, LoopWhile
+from common.tokens.string_tokens import *
+import common.tokens.robot_tokens as robot_tokens
+
+
+class TestTokenId(unittest.TestCase):
+    def test_plain(self):
+        self.assertEqual(MoveRight().token_id(), MoveRight().token_id())
+        self.assertNotEqual(MoveRight().token_id(), MoveLeft().token_id())
+        self.assertNotEqual(MoveRight().token_id(), robot_tokens.MoveRight().token_id())
+
+    def test_structural(self):
+        t1 = If(AtEnd(), [Drop()], [InventedToken([MoveRight(), MakeUppercase()])])
+        t2 = If(AtEnd(), [Drop()], [InventedToken([MoveRight(), MakeUppercase()])])
+        t3 = If(AtEnd(), [InventedToken([MoveRight(), MakeUppercase()])], [Drop()])
+
+        self.assertEqual(t1.token_id(), t2.token_id())
+        self.assertNotEqual(t1.token_id(), t3.token_id())
+        self.assertNotEqual(LoopWhile(AtEnd(), [Drop()]).token_id(), If(AtEnd(), [Drop()], []).token_id())
+        self.assertNotEqual(InventedToken([Drop()]).token_id(), Drop().token_id())
+
+    def test_reassigned(self):
+        t = LoopWhile(AtEnd(), [Drop()])
+        old_id = t.token_id()
+
+        t.loop_body = [MoveLeft()]
+
+        self.assertNotEqual(t.token_id(), old_id)
+        self.assertEqual(t.token_id(), LoopWhile(AtEnd(), [MoveLeft()]).token_id())
+        self.assertEqual(copy.copy(t).token_id(), t.token_id())
+
+    def test_nested_altered(self):
+        inner = InventedToken([MoveRight()])
+        t = If(AtEnd(), [LoopWhile(IsLetter(), [inner])], [])
+        p = Program([t])
+        old_id, old_key = t.token_id(), p.key()
+
+        inner.tokens = [MoveLeft()]
+        t.e1[0].loop_body = t.e1[0].loop_body + [Drop()]
+
+        # The IDs of the tokens holding the altered ones, and therefore the program key, change as well.
+        self.assertNotEqual(t.token_id(), old_id)
+        self.assertNotEqual(p.key(), old_key)
+        self.assertEqual(p, Program([If(AtEnd(), [LoopWhile(IsLetter(), [InventedToken([MoveLeft()]), Drop()])], [])]))
+
+    def test_cleared(self):
+        t = LoopWhile(AtEnd(), [Drop()])
+        t.token_id()
+
+        clear_token_ids()
+
+        self.assertEqual(t.token_id(), LoopWhile(AtEnd(), [Drop()]).token_id())
+        self.assertEqual(len(abstract_tokens._token_ids), 3)
+
+
+class TestProgramKey(unittest.TestCase):
+    def test_eq(self):
+        p1 = Program([MoveRight(), If(IsLetter(), [MakeUppercase()], [])])
+        p2 = Program([MoveRight(), If(IsLetter(), [MakeUppercase()], [])])
+        p3 = Program([If(IsLetter(), [MakeUppercase()], []), MoveRight()])
+
+        self.assertEqual(p1, p2)
+        self.assertEqual(hash(p1), hash(p2))
+        self.assertNotEqual(p1, p3)
+        self.assertEqual(len({p1, p2, p3}), 2)
+
+    def test_appended(self):
+        p = Program([MoveRight()])
+        key = p.key()
+
+        p.sequence.append(Drop())
+
+        self.assertNotEqual(p.key(), key)
+        self.assertEqual(p, Program([MoveRight(), Drop()]))
+
+
+if __name__ == '__main__':
+    unittest.main()
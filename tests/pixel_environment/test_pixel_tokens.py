@@ -38,6 +38,12 @@ class TestPixelTokens(TestCase):
         expected = (False, True, False, False, False, True)
         self.assertEqual(expected, result.pixels)
 
+    def test_erase(self):
+        p1 = Program([Draw(), MoveRight(), Draw(), Erase(), MoveLeft(), Erase(), Draw()])
+        result = p1.interp(self.env2)
+        self.assertEqual((True, False, False, False, False, False), result.pixels)
+        self.assertEqual(1, result.bitmap)
+
 
 class TestPixelDistance(TestCase):
     def test_pixel_distance(self):
@@ -54,4 +60,11 @@ class TestPixelEquality(TestCase):
         env_different = PixelEnvironment(2, 3, 0, 0, (False, False, False, True, False, False))
         self.assertEqual(env, env_equal)
         self.assertNotEqual(env, env_different)
-        self.assertNotEqual(env_equal, env_different)
\ No newline at end of file
+        self.assertNotEqual(env_equal, env_different)
+
+    def test_pixel_hash(self):
+        env = PixelEnvironment(2, 3, 0, 0, (False, True, False, True, False, False))
+        env_equal = PixelEnvironment(2, 3, 0, 0, bitmap=0b1010)
+        self.assertEqual(env, env_equal)
+        self.assertEqual(hash(env), hash(env_equal))
+        self.assertEqual(str(env), "PixelEnvironment((0, 0), (False, True, False, True, False, False))")
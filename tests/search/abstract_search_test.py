@@ -35,6 +35,15 @@ class MyTestCase(unittest.TestCase):
 
         self.assertEqual(s.iter_number, 11)
 
+    def test_distance_cache_stats(self):
+        s = MySearch(10, 1)
+        s.distance_cache_size = 5
+
+        r = s.run(None, None, None)
+
+        self.assertEqual(r.dictionary['distance_cache_capacity'], 5)
+        self.assertEqual(r.dictionary['distance_cache_hits'], 0)
+
     def test_timeout(self):
         s = MySearch(math.pow(10, 10), 1)
 
@@ -0,0 +1,89 @@
+import random
+import unittest
+
+from common.environment import StringEnvironment
+from common.experiment import Example
+from common.tokens.string_tokens import BoolTokens, TransTokens
+from search.brute.brute import Brute, FRONTIER_SLACK, SELECTION_RATIO
+
+
+class TestStateBasedBrute(unittest.TestCase):
+    def setUp(self):
+        self.examples = [
+            Example(StringEnvironment(list("ab")), StringEnvironment(list("AB"))),
+            Example(StringEnvironment(list("cde")), StringEnvironment(list("CDE"))),
+        ]
+
+    def test_solves(self):
+        brute = Brute(10)
+        brute.state_based = True
+
+        result = brute.run(self.examples, TransTokens, BoolTokens).dictionary
+
+        for example in self.examples:
+            self.assertTrue(result["program"].interp(example.input_environment).correct(example.output_environment))
+        self.assertGreater(result["number_of_duplicate_states"], 0)
+
+    def test_states_unique(self):
+        brute = Brute(10)
+        brute.state_based = True
+        brute.run(self.examples, TransTokens, BoolTokens)
+
+        # Every reached tuple of environments is reached by the program rebuilt from its parents.
+        for states in brute.parents:
+            program = brute._program(states)
+            self.assertEqual(tuple(program.interp(e.input_environment) for e in self.examples), states)
+
+
+class TestBoundedBrute(unittest.TestCase):
+    def setUp(self):
+        self.examples = [Example(StringEnvironment(list("abcd")), StringEnvironment(list("ABCD")))]
+
+    def test_max_frontier_size(self):
+        for state_based in (False, True):
+            brute = Brute(10)
+            brute.state_based = state_based
+            brute.max_frontier_size = 20
+
+            result = brute.run(self.examples, TransTokens, BoolTokens).dictionary
+
+            self.assertLessEqual(len(brute.programs), 20 * (1 + FRONTIER_SLACK) + len(brute.token_functions))
+            self.assertGreater(result["number_of_dropped_programs"], 0)
+
+    def test_beam_width(self):
+        brute = Brute(10)
+        brute.beam_width = 10
+
+        result = brute.run(self.examples, TransTokens, BoolTokens).dictionary
+
+        self.assertLessEqual(len(brute.programs), 10)
+        self.assertGreater(result["number_of_dropped_programs"], 0)
+        self.assertEqual(result["program"].interp(self.examples[0].input_environment).to_string(), "ABCD")
+
+    def test_beam_width_states(self):
+        brute = Brute(10)
+        brute.state_based = True
+        brute.beam_width = 10
+
+        result = brute.run(self.examples, TransTokens, BoolTokens).dictionary
+
+        # Dropped environments are forgotten: only the expanded ones and the beam are kept.
+        self.assertLessEqual(len(brute.programs), 10)
+        self.assertEqual(len(brute.parents), result["number_of_reached_states"])
+        self.assertLessEqual(len(brute.parents), 1 + 10 * (result["number_of_iterations"] + 1))
+
+    def test_best(self):
+        rng = random.Random(0)
+        frontier = [(rng.randrange(10), rng.randrange(2), i, (i,), None) for i in range(100)]
+
+        # Both selecting few entries and sorting the frontier keep the same, sorted, best entries.
+        for n in (100 // SELECTION_RATIO - 1, 100 // SELECTION_RATIO + 1, 150):
+            brute = Brute(10)
+            brute.number_of_dropped_programs = 0
+            best = brute._best(list(frontier), n)
+            self.assertEqual(best, sorted(frontier)[:n])
+            self.assertEqual(brute.number_of_dropped_programs, max(0, 100 - n))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+from common.environment import StringEnvironment
+from common.experiment import Example
+from common.tokens.string_tokens import BoolTokens, TransTokens
+from search.a_star.a_star import AStar
+from search.brute.brute import Brute
+from search.convergence_trace import ConvergenceTrace
+from search.vlns.large_neighborhood_search.algorithms.remove_n_insert_n import RemoveNInsertN
+
+
+class TestConvergenceTrace(unittest.TestCase):
+    def test_change_points(self):
+        trace = ConvergenceTrace()
+        for i, v in enumerate([3, 3, 2, 2, 4, 4, 4]):
+            trace.record(i, v)
+
+        self.assertEqual(list(trace), [(0, 3), (2, 2), (4, 4)])
+
+    def test_improvements_only(self):
+        trace = ConvergenceTrace(improvements_only=True)
+        for i, v in enumerate([float("inf"), 3, 4, 2, 2, 5, 1]):
+            trace.record(i, v)
+
+        self.assertEqual(list(trace), [(0, float("inf")), (1, 3), (3, 2), (6, 1)])
+
+    def test_downsampling(self):
+        trace = ConvergenceTrace(max_points=10)
+        for i in range(1001):
+            trace.record(i, i)
+
+        points = list(trace)
+        self.assertLessEqual(len(points), 11)
+        self.assertEqual(len(points), len(trace))
+        self.assertEqual(points[0], (0, 0))
+        # The points are spread evenly, and the most recent one is kept.
+        self.assertEqual(points[1][0], trace.stride)
+        self.assertEqual(points[-1], (1000, 1000))
+
+    def test_searches(self):
+        examples = [Example(StringEnvironment(list("ab")), StringEnvironment(list("AB")))]
+
+        for algorithm in (Brute(10), AStar(10)):
+            costs = algorithm.run(examples, TransTokens, BoolTokens).dictionary["cost_per_iteration"]
+
+            self.assertIsInstance(costs, list)
+            self.assertEqual(costs, sorted(costs, key=lambda point: -point[1]))
+
+    def test_result_keys(self):
+        examples = [Example(StringEnvironment(list("ab")), StringEnvironment(list("AB")))]
+
+        # Traces are reported under new keys, such that readers of the per-iteration lists do not misread them.
+        brute = Brute(10).run(examples, TransTokens, BoolTokens).dictionary
+        a_star = AStar(10).run(examples, TransTokens, BoolTokens).dictionary
+        self.assertIn("program_length_trace", brute)
+        self.assertNotIn("program_length_per_iteration", brute)
+        self.assertIn("g_cost_trace", a_star)
+        self.assertNotIn("g_cost_per_iteration", a_star)
+
+    def test_lns_extend_result_twice(self):
+        examples = [Example(StringEnvironment(list("ab")), StringEnvironment(list("AB")))]
+        lns = RemoveNInsertN(0.5)
+
+        result = lns.run(examples, list(TransTokens), list(BoolTokens))
+        expected = dict(result.dictionary)
+
+        # The traces and averages of the result are computed from a copy of the stats, which stay intact.
+        self.assertEqual(lns.extend_result(result).dictionary, expected)
+        self.assertIsInstance(lns.stats["best_cost_trace"], ConvergenceTrace)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import math
+import time
+import unittest
+
+from common.environment import StringEnvironment
+from common.experiment import Example
+from common.prorgam import Program
+from common.tokens.string_tokens import BoolTokens, TransTokens
+from search.brute.brute import Brute
+from search.deadline import Deadline, DeadlineReached
+from search.evaluator import Evaluator
+
+
+class TestDeadline(unittest.TestCase):
+    def test_expired(self):
+        deadline = Deadline(0, check_every=2)
+
+        self.assertTrue(deadline.expired())
+        # The clock is only read on every second call.
+        deadline.check()
+        self.assertRaises(DeadlineReached, deadline.check)
+
+    def test_not_expired(self):
+        deadline = Deadline(math.inf, wall_time=True, check_every=1)
+
+        self.assertFalse(deadline.expired())
+        deadline.check()
+        self.assertEqual(deadline.stats()["clock"], "wall")
+        self.assertEqual(deadline.stats()["overshoot"], 0)
+
+    def test_overshoot(self):
+        deadline = Deadline(0.01, wall_time=True)
+        time.sleep(0.02)
+
+        self.assertGreaterEqual(deadline.stats()["overshoot"], 0.01)
+
+    def test_evaluator(self):
+        examples = [Example(StringEnvironment(list("ab")), StringEnvironment(list("AB")))]
+        evaluator = Evaluator(examples)
+        evaluator.deadline = Deadline(0, check_every=1)
+
+        self.assertRaises(DeadlineReached, evaluator.evaluate, Program([]))
+
+    def test_search_result(self):
+        examples = [Example(StringEnvironment(list("abc" * 10)), StringEnvironment(list("xyz")))]
+        brute = Brute(0.05)
+        brute.wall_time = True
+
+        result = brute.run(examples, TransTokens, BoolTokens).dictionary
+
+        self.assertEqual(result["deadline_clock"], "wall")
+        self.assertGreaterEqual(result["execution_time"], 0.05)
+        self.assertLess(result["deadline_overshoot"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import math
+import unittest
+
+from common.environment import StringEnvironment
+from common.experiment import Example
+from common.prorgam import Program
+from common.tokens.control_tokens import LoopWhile
+from common.tokens.string_tokens import MakeUppercase, MoveLeft, MoveRight, NotAtEnd, BoolTokens, TransTokens
+from search.evaluator import Evaluator, distance_with_penalty
+from search.metropolis_hastings.metropolis import MetropolisHasting
+
+
+class TestEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.examples = [
+            Example(StringEnvironment(list("ab")), StringEnvironment(list("AB"))),
+            Example(StringEnvironment(list("cd")), StringEnvironment(list("Cd"))),
+        ]
+
+    def test_evaluate(self):
+        evaluator = Evaluator(self.examples)
+
+        self.assertEqual(evaluator.evaluate(Program([MakeUppercase()])), (1, False))
+        self.assertEqual(evaluator.evaluate(Program([])), (3, False))
+        self.assertEqual(evaluator.stats()["evaluations"], 2)
+        self.assertEqual(evaluator.stats()["early_exits"], 0)
+        self.assertEqual(self.examples[0].input_environment, StringEnvironment(list("ab")))
+
+    def test_exception(self):
+        evaluator = Evaluator(self.examples)
+
+        self.assertEqual(evaluator.evaluate(Program([MoveLeft()])), (math.inf, False))
+        self.assertEqual(evaluator.stats()["early_exits"], 1)
+
+    def test_bound(self):
+        evaluator = Evaluator(self.examples)
+
+        # The second example exceeds the bound first, and is tried first afterwards.
+        cost, solved = evaluator.evaluate(Program([]), 2.5)
+        self.assertEqual((cost, solved), (3, False))
+        self.assertEqual(evaluator.stats()["early_exits"], 0)
+
+        cost, solved = evaluator.evaluate(Program([]), 0.5)
+        self.assertEqual((cost, solved), (1, False))
+        self.assertEqual(evaluator.stats()["early_exits"], 1)
+
+    def test_mean(self):
+        evaluator = Evaluator(self.examples, loss=distance_with_penalty, mean=True)
+
+        self.assertEqual(evaluator.evaluate(Program([MakeUppercase()])), (1, False))
+        self.assertEqual(evaluator.evaluate(Program([])), (2.5, False))
+        # The bound applies to the mean as well.
+        self.assertEqual(evaluator.evaluate(Program([]), 0.5), (1.5, False))
+
+    def test_cache(self):
+        evaluator = Evaluator(self.examples, cache_size=10)
+
+        self.assertEqual(evaluator.evaluate(Program([]), 0.5), (2, False))
+        # The lower bound cached above does not settle an evaluation with a higher bound.
+        self.assertEqual(evaluator.evaluate(Program([])), (3, False))
+        self.assertEqual(evaluator.evaluate(Program([])), (3, False))
+        self.assertEqual(evaluator.stats()["evaluations"], 2)
+        self.assertEqual(evaluator.stats()["cache_hits"], 2)
+
+    def test_losses(self):
+        evaluator = Evaluator(self.examples)
+
+        self.assertEqual(evaluator.losses(Program([MakeUppercase()])), ([1, 0], False))
+        self.assertEqual(evaluator.losses(Program([MoveLeft()])), ([math.inf, math.inf], False))
+
+    def test_outputs(self):
+        evaluator = Evaluator(self.examples)
+
+        outputs = evaluator.outputs(Program([MakeUppercase()]))
+        self.assertEqual([o.to_string() for o in outputs], ["Ab", "Cd"])
+        self.assertEqual(evaluator.cost_of(outputs), (1, False))
+        self.assertRaises(Exception, evaluator.outputs, Program([MoveLeft()]))
+
+    def test_run(self):
+        # Evaluates a list of tokens instead of a Program.
+        evaluator = Evaluator(self.examples, run=lambda tokens, env: Program(tokens).interp_in_place(env), key=tuple)
+
+        self.assertEqual(evaluator.evaluate([MakeUppercase()]), (1, False))
+
+    def test_steps(self):
+        evaluator = Evaluator(self.examples)
+        loop = Program([LoopWhile(NotAtEnd(), [MoveRight()])], step_limit=0)
+
+        self.assertEqual(evaluator.evaluate(Program([LoopWhile(NotAtEnd(), [MoveRight()])])), (3, False))
+        self.assertEqual(evaluator.stats()["steps"], 2)
+        self.assertEqual(evaluator.evaluate(loop), (math.inf, False))
+        self.assertEqual(evaluator.stats()["step_limit_reached"], 1)
+
+    def test_metropolis(self):
+        examples = [Example(StringEnvironment(list("ab")), StringEnvironment(list("AB")))]
+        result = MetropolisHasting(5, {"add_token_end": 10, "remove_token_end": 10}).run(examples, TransTokens, BoolTokens)
+
+        self.assertEqual(result.dictionary["program"].interp(examples[0].input_environment).to_string(), "AB")
+        self.assertGreater(result.dictionary["evaluator_evaluations"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from common.environment import StringEnvironment
+from common.experiment import Example
+from common.prorgam import Program
+from common.tokens.string_tokens import *
+from search.gen_prog.vanilla_GP_alternatives import fitness
+
+
+class TestErrorMatrix(unittest.TestCase):
+    examples = [
+        Example(StringEnvironment(list("hello")), StringEnvironment(list("Hello"))),
+        Example(StringEnvironment(list("a")), StringEnvironment(list("A"))),
+        Example(StringEnvironment(list("abc")), StringEnvironment(list("bc"))),
+    ]
+    programs = [
+        Program([]),
+        Program([MakeUppercase()]),
+        Program([MoveRight()]),
+        Program([MakeUppercase()]),
+    ]
+
+    def test_error_matrix(self):
+        errors, solved = fitness.error_matrix(self.programs, self.examples)
+
+        for i, program in enumerate(self.programs):
+            for j, example in enumerate(self.examples):
+                self.assertEqual(errors[i, j], fitness.program_error_example(program, example))
+        self.assertEqual(solved.tolist(), [False, False, False, False])
+
+        # The input environments are left untouched.
+        self.assertEqual([ex.input_environment.to_string() for ex in self.examples], ["hello", "a", "abc"])
+
+    def test_gen_error_from_matrix(self):
+        expected = fitness.gen_error(self.programs, self.examples)
+        result = fitness.gen_error_from_matrix(self.programs, *fitness.error_matrix(self.programs, self.examples))
+
+        self.assertEqual([e for e, _ in result], [e for e, _ in expected])
+
+    def test_solved(self):
+        errors, solved = fitness.error_matrix([Program([MakeUppercase()])], self.examples[:2])
+
+        self.assertEqual(solved.tolist(), [True])
+        self.assertEqual(fitness.gen_error_from_matrix([Program([MakeUppercase()])], errors, solved)[0][0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+from common.environment import StringEnvironment
+from common.experiment import Example
+from common.tokens.abstract_tokens import InventedToken
+from common.tokens.string_tokens import BoolTokens, TransTokens, MakeUppercase, MakeLowercase, MoveRight, MoveLeft
+from search.brute.brute import Brute
+from search.invent import invent2, prune_equivalent, iterInvent2, countInvent2, generatePermutations, countPermutations
+
+
+class TestInvent(unittest.TestCase):
+    def test_permutations(self):
+        permutations = generatePermutations([1, 2, 3], 2)
+
+        self.assertEqual(permutations, [(1, 2), (1, 3), (2, 1), (2, 3), (3, 1), (3, 2), (1,), (2,), (3,)])
+        self.assertEqual(countPermutations(3, 2), len(permutations))
+
+    def test_count(self):
+        for depth in range(5):
+            self.assertEqual(countInvent2(TransTokens, BoolTokens, depth), len(invent2(TransTokens, BoolTokens, depth)))
+
+    def test_deterministic_order(self):
+        tokens = invent2(TransTokens, BoolTokens, 3)
+
+        self.assertEqual([str(t) for t in tokens], [str(t) for t in iterInvent2(set(TransTokens), BoolTokens, 3)])
+        self.assertEqual([str(t) for t in tokens], [str(t) for t in invent2(sorted(TransTokens, key=str), BoolTokens, 3)])
+
+
+class TestPruneEquivalent(unittest.TestCase):
+    def test_keeps_shortest_representative(self):
+        tokens = [InventedToken([MakeUppercase(), MakeUppercase()]), MakeUppercase(), MakeLowercase()]
+
+        pruned = prune_equivalent(tokens, [StringEnvironment(list("ab"))], TransTokens)
+
+        self.assertEqual(pruned, [tokens[1], tokens[2]])
+
+    def test_probes_distinguish_tokens(self):
+        # Both tokens fail on the input itself, but differ once the pointer has moved right.
+        tokens = [MoveLeft(), InventedToken([MoveLeft(), MakeUppercase()])]
+        env = StringEnvironment(list("ab"))
+
+        self.assertEqual(len(prune_equivalent(tokens, [env], probe_depth=0)), 1)
+        self.assertEqual(len(prune_equivalent(tokens, [env], [MoveRight()])), 2)
+
+    def test_hash_collision(self):
+        tokens = [MoveRight(), MakeUppercase()]
+
+        # Tokens yielding distinct environments are kept, even if the hashes of these environments collide.
+        with mock.patch.object(StringEnvironment, "__hash__", lambda self: 0):
+            self.assertEqual(prune_equivalent(tokens, [StringEnvironment(list("ab"))], TransTokens), tokens)
+
+    def test_inputs_untouched(self):
+        env = StringEnvironment(list("ab"))
+        tokens = invent2(TransTokens, BoolTokens, 3)
+
+        pruned = prune_equivalent(tokens, [env], TransTokens)
+
+        self.assertEqual(pruned, prune_equivalent(iter(tokens), [env], TransTokens))
+        self.assertLess(len(pruned), len(tokens))
+        self.assertEqual(env, StringEnvironment(list("ab")))
+
+    def test_brute(self):
+        examples = [Example(StringEnvironment(list("ab")), StringEnvironment(list("AB")))]
+        brute = Brute(10)
+        brute.prune_equivalent_tokens = True
+
+        result = brute.run(examples, TransTokens, BoolTokens)
+
+        self.assertEqual(result.dictionary["program"].interp(examples[0].input_environment).to_string(), "AB")
+
+
+if __name__ == '__main__':
+    unittest.main()
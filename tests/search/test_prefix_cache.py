@@ -0,0 +1,63 @@
+import unittest
+
+from common.environment import StringEnvironment
+from common.prorgam import Program
+from common.tokens.control_tokens import LoopWhile, StepLimitReached
+from common.tokens.string_tokens import *
+from search.brute.brute import evaluate_program
+from search.prefix_cache import PrefixCache
+
+
+class TestPrefixCache(unittest.TestCase):
+    def setUp(self):
+        self.inputs = [StringEnvironment(list("hello world")), StringEnvironment(list("abc def"))]
+        self.outputs = [StringEnvironment(list("HELLO world")), StringEnvironment(list("ABC def"))]
+        self.tokens = [MakeUppercase(), MoveRight(), LoopWhile(IsLetter(), [MakeUppercase(), MoveRight()]), MoveLeft()]
+
+    def _check(self, cache: PrefixCache, key: tuple):
+        tokens = [self.tokens[i] for i in key]
+        parent = cache.resolve(key, tokens)
+
+        for token in self.tokens:
+            cost, solved, _ = evaluate_program(Program(tokens + [token]), self.inputs, self.outputs)
+            expected = (cost, solved == 0) if cost != float("inf") else (cost, False)
+            self.assertEqual(cache.evaluate(parent, token), expected)
+
+    def test_evaluate(self):
+        cache = PrefixCache(self.inputs, self.outputs)
+        self._check(cache, ())
+        self._check(cache, (0,))
+        self._check(cache, (0, 1))
+        self._check(cache, (0, 1, 2))
+
+    def test_eviction(self):
+        cache = PrefixCache(self.inputs, self.outputs, capacity=1)
+        self._check(cache, (1,))
+        self._check(cache, (1, 0, 1))
+        self._check(cache, (2,))
+
+        self.assertEqual(len(cache._entries), 1)
+        self.assertEqual(cache.stats()["evictions"], 2)
+
+    def test_step_limit(self):
+        tokens = [LoopWhile(NotAtEnd(), [MoveRight()]), LoopWhile(NotAtStart(), [MoveLeft()])]
+        self.assertRaises(StepLimitReached, lambda: Program(tokens, step_limit=15).interp(self.inputs[0]))
+
+        # The budget covers the whole program, whether it is derived from a cached prefix or interpreted again.
+        for capacity in (1, 10):
+            cache = PrefixCache(self.inputs, self.outputs, capacity=capacity, step_limit=15)
+            parent = cache.resolve((0,), tokens[:1])
+            self.assertEqual(cache.evaluate(parent, tokens[1]), (float("inf"), False))
+            cache.resolve((), [])
+            self.assertIsNone(cache.resolve((0, 1), tokens))
+
+    def test_inputs_unchanged(self):
+        cache = PrefixCache(self.inputs, self.outputs)
+        self._check(cache, (2,))
+
+        self.assertEqual(self.inputs[0].to_string(), "hello world")
+        self.assertEqual(self.inputs[0].pos, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import random
+import unittest
+
+import numpy as np
+
+from common.environment import StringEnvironment
+from common.experiment import Example
+from common.prorgam import Program
+from common.tokens.string_tokens import *
+from search.gen_prog.vanilla_GP_alternatives import selection
+
+inf = float("inf")
+
+
+class TestLexicase(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+
+    def test_elite(self):
+        errors = np.array([
+            [0, 1, 1],
+            [1, 0, inf],
+            [0, 0, 0],
+            [inf, inf, inf],
+        ])
+
+        for _ in range(20):
+            self.assertEqual(selection.lexicase(["a", "b", "c", "d"], errors), "c")
+
+    def test_specialists(self):
+        errors = np.array([
+            [0, 1],
+            [1, 0],
+            [1, 1],
+        ])
+        selected = {selection.lexicase(["a", "b", "c"], errors) for _ in range(50)}
+
+        self.assertEqual(selected, {"a", "b"})
+
+    def test_max_cases(self):
+        errors = np.array([
+            [0, 0, 1],
+            [0, 0, 0],
+        ])
+        selected = {selection.lexicase(["a", "b"], errors, max_cases=1) for _ in range(50)}
+
+        self.assertEqual(selected, {"a", "b"})
+
+    def test_all_failing(self):
+        errors = np.array([[inf], [inf]])
+        selected = {selection.lexicase(["a", "b"], errors) for _ in range(50)}
+
+        self.assertEqual(selected, {"a", "b"})
+
+    def test_selection_lexicase(self):
+        examples = [
+            Example(StringEnvironment(list("ab")), StringEnvironment(list("Ab"))),
+            Example(StringEnvironment(list("cd")), StringEnvironment(list("Cd"))),
+        ]
+        gen = [Program([]), Program([MakeUppercase()]), Program([MoveRight(), MakeUppercase()])]
+
+        self.assertEqual(selection.selection_lexicase(gen, examples), [gen[1]] * 3)
+        self.assertEqual(selection.downsampled_lexicase_selection(gen, examples), [gen[1]] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+
+from common.tokens import pixel_tokens, string_tokens
+from search.invent import invent2
+from search.token_library import TokenLibraries
+
+
+class TestTokenLibraries(unittest.TestCase):
+    def test_built_once(self):
+        libraries = TokenLibraries()
+        builds = []
+
+        def build():
+            builds.append(1)
+            return invent2(string_tokens.TransTokens, string_tokens.BoolTokens, 2)
+
+        first = libraries.get("invent2", string_tokens.TransTokens, string_tokens.BoolTokens, (2,), build)
+        second = libraries.get("invent2", set(string_tokens.TransTokens), string_tokens.BoolTokens, (2,), build)
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual(libraries.stats(), {"hits": 1, "loads": 0, "builds": 1, "size": 1})
+
+    def test_keys(self):
+        libraries = TokenLibraries()
+
+        libraries.get("invent2", string_tokens.TransTokens, string_tokens.BoolTokens, (2,), lambda: [])
+        libraries.get("invent2", string_tokens.TransTokens, string_tokens.BoolTokens, (3,), lambda: [])
+        libraries.get("invent2", pixel_tokens.TransTokens, pixel_tokens.BoolTokens, (2,), lambda: [])
+
+        self.assertEqual(len(libraries), 3)
+
+    def test_persist(self):
+        with tempfile.TemporaryDirectory() as directory:
+            tokens = invent2(string_tokens.TransTokens, string_tokens.BoolTokens, 4)
+            TokenLibraries(directory).get("invent2", string_tokens.TransTokens, string_tokens.BoolTokens, (4,),
+                                          lambda: tokens)
+
+            libraries = TokenLibraries(directory)
+            loaded = libraries.get("invent2", string_tokens.TransTokens, string_tokens.BoolTokens, (4,), lambda: [])
+
+            self.assertEqual(libraries.stats()["loads"], 1)
+            self.assertEqual([str(t) for t in loaded], [str(t) for t in tokens])
+            self.assertEqual([t.token_id() for t in loaded], [t.token_id() for t in tokens])
+
+    def test_using_directory(self):
+        libraries = TokenLibraries()
+
+        with tempfile.TemporaryDirectory() as directory:
+            with libraries.using_directory(directory):
+                self.assertEqual(libraries.directory, directory)
+                with libraries.using_directory(None):
+                    self.assertEqual(libraries.directory, directory)
+
+        # The directory is only used within the context.
+        self.assertIsNone(libraries.directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from common.environment import StringEnvironment
+from common.experiment import Example
+from common.tokens.string_tokens import BoolTokens, TransTokens
+from search.a_star.a_star import AStar
+from search.brute.brute import Brute
+from search.transposition_table import TranspositionTable
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_visit(self):
+        table = TranspositionTable()
+
+        self.assertFalse(table.visit((StringEnvironment(list("ab")), StringEnvironment(list("cd")))))
+        self.assertTrue(table.visit((StringEnvironment(list("ab")), StringEnvironment(list("cd")))))
+        self.assertFalse(table.visit((StringEnvironment(list("ab"), 1), StringEnvironment(list("cd")))))
+        self.assertIn([StringEnvironment(list("ab")), StringEnvironment(list("cd"))], table)
+        self.assertEqual(len(table), 2)
+
+        stats = table.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3)
+
+    def test_hash_collision(self):
+        class CollidingEnvironment(StringEnvironment):
+            def __hash__(self):
+                return 0
+
+        table = TranspositionTable()
+
+        # Distinct environments with the same hash are not equivalent.
+        self.assertFalse(table.visit((CollidingEnvironment(list("ab")),)))
+        self.assertFalse(table.visit((CollidingEnvironment(list("cd")),)))
+        self.assertTrue(table.visit((CollidingEnvironment(list("cd")),)))
+
+    def test_capacity(self):
+        table = TranspositionTable(2)
+
+        for s in ["a", "b", "c"]:
+            table.visit((StringEnvironment(list(s)),))
+
+        self.assertEqual(len(table), 2)
+        self.assertNotIn((StringEnvironment(list("a")),), table)
+
+    def test_brute(self):
+        examples = [
+            Example(StringEnvironment(list("hello world")), StringEnvironment(list("HELLO WORLD"))),
+            Example(StringEnvironment(list("ab")), StringEnvironment(list("AB"))),
+        ]
+        brute = Brute(10)
+        brute.use_transposition_table = True
+
+        result = brute.run(examples, TransTokens, BoolTokens)
+
+        self.assertEqual(result.dictionary["program"].interp(examples[0].input_environment).to_string(), "HELLO WORLD")
+        self.assertGreater(result.dictionary["transposition_table_hits"], 0)
+
+    def test_unsupported(self):
+        examples = [Example(StringEnvironment(list("ab")), StringEnvironment(list("AB")))]
+        a_star = AStar(10)
+        a_star.use_transposition_table = True
+
+        self.assertRaises(ValueError, lambda: a_star.run(examples, TransTokens, BoolTokens))
+
+
+if __name__ == '__main__':
+    unittest.main()
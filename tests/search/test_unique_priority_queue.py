@@ -0,0 +1,65 @@
+import random
+import unittest
+
+from search.a_star.unique_priority_queue import UniquePriorityQueue
+
+
+class TestUniquePriorityQueue(unittest.TestCase):
+    def test_order(self):
+        queue = UniquePriorityQueue()
+        for item, priority in [("a", 2), ("b", 1), ("c", 2), ("d", 0)]:
+            queue.insert(item, priority)
+
+        self.assertTrue(queue.insert("d", 2))
+        self.assertFalse(queue.insert("e", 1))
+
+        # Items with the same priority are popped in the order in which they were inserted or last updated.
+        self.assertEqual([queue.pop() for _ in range(5)], [("b", 1), ("e", 1), ("a", 2), ("c", 2), ("d", 2)])
+        self.assertFalse(queue)
+        self.assertRaises(IndexError, queue.pop)
+
+    def test_decrease_key(self):
+        queue = UniquePriorityQueue()
+        for i in range(100):
+            queue.insert(i, 100 - i)
+        for i in range(100):
+            queue.insert(i, i)
+
+        # Updates replace the entry of an item, no stale entries are left behind.
+        self.assertEqual(len(queue.heap), 100)
+        self.assertEqual([queue.pop()[0] for _ in range(100)], list(range(100)))
+
+    def test_insert_all_duplicates(self):
+        queue = UniquePriorityQueue()
+        queue.insert("a", 5)
+
+        # "b" is new, so its second priority in the batch is no update of a queued item.
+        self.assertEqual(queue.insert_all([("a", 4), ("b", 3), ("b", 2), ("a", 1)]), 1)
+        self.assertEqual([queue.pop() for _ in range(2)], [("a", 1), ("b", 2)])
+
+    def test_random(self):
+        rng = random.Random(0)
+        for arity in (2, 4):
+            queue = UniquePriorityQueue(arity)
+            reference = {}  # for each item: (priority, insertion number)
+            count = 0
+
+            for _ in range(2000):
+                if reference and rng.random() < 0.3:
+                    item, priority = queue.pop()
+                    expected = min(reference, key=reference.get)
+                    self.assertEqual((item, priority), (expected, reference.pop(expected)[0]))
+                else:
+                    batch = [(rng.randrange(200), rng.randrange(50)) for _ in range(rng.choice((1, 3, 500)))]
+                    updated = queue.insert_all(batch) if len(batch) > 1 else queue.insert(*batch[0])
+                    # Items occurring several times in a batch are counted once, and only if they were queued before.
+                    expected_updated = len({item for item, _ in batch if item in reference})
+                    for item, priority in batch:
+                        reference[item] = (priority, count)
+                        count += 1
+                    self.assertEqual(updated, expected_updated)
+                self.assertEqual(len(queue), len(reference))
+
+
+if __name__ == '__main__':
+    unittest.main()